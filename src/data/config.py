@@ -55,6 +55,9 @@ LEDGER_IND_COMMODITY_LIST = BASE_DIR / "portfolio/common/commodities/ind.db"
 LEDGER_IND_MF_COMMODITY_LIST = BASE_DIR / "portfolio/common/commodities/ind-mf.db"
 LEDGER_US_COMMODITY_LIST = BASE_DIR / "portfolio/common/commodities/us.db"
 
+# Local cache for downloaded reference data, kept out of the repo
+CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "bugsybytes-api"
+
 # Terminal Codes
 RED_BOLD = "\033[1;91m"
 RESET = "\033[0m"
@@ -4,13 +4,13 @@ from datetime import datetime
 from functools import partial
 
 import requests
-import yaml
 
 from src.data.config import DASHBOARD_CONFIG_PATH
 from src.service.portfolio.dashboard.nifty_index_data import fetch_nse_stocks
 from src.service.portfolio.ledger.ledger_cli_output_parser import (
     get_ledger_cli_output_by_config,
 )
+from src.service.util.config_loader import load_yaml_config
 from src.service.util.date_util import parse_indian_date_format
 from src.service.util.xirr_calculator import xirr
 
@@ -18,8 +18,7 @@ _MF_CACHE = None
 _NIFTY_INDEX_CACHE = None
 
 
-with open(DASHBOARD_CONFIG_PATH, "r") as f:
-    dashboard_config = yaml.safe_load(f)
+dashboard_config = load_yaml_config(DASHBOARD_CONFIG_PATH)
 
 
 def fetch_nifty_index():
@@ -1,4 +1,8 @@
+import concurrent.futures
 import sys
+from operator import itemgetter
+
+import pandas as pd
 
 from src.data.config import RED_BOLD, RESET
 from src.service.portfolio.ledger.ledger_cli_output_parser import (
@@ -6,34 +10,99 @@ from src.service.portfolio.ledger.ledger_cli_output_parser import (
 )
 
 
-def is_zero_account(account, zero_list):
-    return any(account.startswith(z) for z in zero_list)
+def is_zero_account(account, zero_prefixes):
+    return account.startswith(zero_prefixes)
 
 
-def sum_accounts(data, prefix, zero_list):
-    return sum(
-        entry["amount"]
-        for entry in data
-        if entry["account"].startswith(prefix.replace('"', ""))
-        and not is_zero_account(entry["account"], zero_list)
+def build_prefix_trie(prefixes):
+    """
+    Trie over ":"-separated account segments.
+    Each node maps a segment to its child node; the value registered for a
+    prefix that ends at a node is stored under the ``None`` key.
+    """
+    trie = {}
+    for value, prefix in prefixes.items():
+        node = trie
+        for segment in prefix.rstrip(":").split(":"):
+            node = node.setdefault(segment, {})
+        node.setdefault(None, value)
+    return trie
+
+
+def match_prefix(trie, account):
+    """
+    Return the value of the longest registered prefix of ``account``,
+    or None when no prefix matches.
+    """
+    node = trie
+    matched = None
+    for segment in account.split(":"):
+        node = node.get(segment)
+        if node is None:
+            break
+        matched = node.get(None, matched)
+    return matched
+
+
+def to_balance_frame(data):
+    """
+    Columnar (account, amount) view of ledger balance rows.
+    Accepts the list of dicts returned by the ledger parser or an
+    already built frame, so it can be built once and shared.
+    """
+    if isinstance(data, pd.DataFrame):
+        return data
+    return pd.DataFrame(data, columns=["account", "amount"])
+
+
+def account_mask(frame, prefix, zero_list):
+    accounts = frame["account"]
+    return accounts.str.startswith(prefix.replace('"', "")) & ~accounts.str.startswith(
+        tuple(zero_list)
     )
 
 
+def sum_accounts(data, prefix, zero_list):
+    frame = to_balance_frame(data)
+    return float(frame.loc[account_mask(frame, prefix, zero_list), "amount"].sum())
+
+
 def filter_accounts(data, prefix, zero_list):
-    return [
-        entry
-        for entry in data
-        if entry["account"].startswith(prefix.replace('"', ""))
-        and not is_zero_account(entry["account"], zero_list)
-    ]
+    frame = to_balance_frame(data)
+    return frame[account_mask(frame, prefix, zero_list)].to_dict("records")
+
+
+def zero_balance_totals(balance_sheet_data, zero_list):
+    """
+    Balance of every zero-balance prefix, computed in a single pass.
+    Each account is sliced at the distinct prefix lengths and looked up in
+    the prefix set, so overlapping prefixes all receive the amount just
+    like a per-prefix startswith scan would.
+    """
+    totals = dict.fromkeys(zero_list, 0)
+    lengths = sorted({len(prefix) for prefix in totals})
+
+    frame = to_balance_frame(balance_sheet_data)
+    for account, amount in zip(frame["account"].tolist(), frame["amount"].tolist()):
+        for length in lengths:
+            if length > len(account):
+                break
+            prefix = account[:length]
+            if prefix in totals:
+                totals[prefix] += amount
+
+    return totals
 
 
 def calculate_category_tables_data(
     balance_sheet_data, categories, zero_balance_accounts_config
 ):
+    balance_sheet_frame = to_balance_frame(balance_sheet_data)
     category_tables_data = []
     for title, prefix in categories.items():
-        data = filter_accounts(balance_sheet_data, prefix, zero_balance_accounts_config)
+        data = filter_accounts(
+            balance_sheet_frame, prefix, zero_balance_accounts_config
+        )
         if not data:
             continue
 
@@ -51,7 +120,7 @@ def calculate_category_tables_data(
                 }
                 for e in data
             ],
-            key=lambda x: x["Amount"],
+            key=itemgetter("Amount"),
             reverse=True,
         )
         category_tables_data.append({"Category": title, "Entries": sorted_data})
@@ -68,6 +137,9 @@ def calculate_summary_data(
     stock_vs_bond_config,
     categories_threshold,
 ):
+    balance_sheet_data = to_balance_frame(balance_sheet_data)
+    income_statement_data = to_balance_frame(income_statement_data)
+
     assets = sum_accounts(balance_sheet_data, "Assets", zero_balance_accounts_config)
     liabilities = sum_accounts(
         balance_sheet_data, "Liabilities", zero_balance_accounts_config
@@ -98,15 +170,27 @@ def calculate_summary_data(
         command_type="commodities",
     )
     mutual_fund_config = mutual_funds["Assets:Investments:MutualFunds"]
-    for commodity in mutual_funds_commodities_data:
-        if commodity == "INR":
-            continue
-        balance_for_commodity = get_ledger_cli_output_by_config(
+    mutual_fund_commodities = [
+        commodity for commodity in mutual_funds_commodities_data if commodity != "INR"
+    ]
+
+    def get_balance_for_commodity(commodity):
+        return get_ledger_cli_output_by_config(
             config=stock_vs_bond_config["balance"],
             ledger_files=ledger_files,
             commodity=commodity,
             command_type="balance",
         )
+
+    # one ledger run per fund, run them side by side and keep the fund order
+    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+        balances_for_commodities = list(
+            executor.map(get_balance_for_commodity, mutual_fund_commodities)
+        )
+
+    for commodity, balance_for_commodity in zip(
+        mutual_fund_commodities, balances_for_commodities
+    ):
         # Validate single current value
         if balance_for_commodity and len(balance_for_commodity) > 1:
             print(
@@ -183,25 +267,23 @@ def calculate_investment_allocation(
     allocation_totals = {name: 0 for name in categories_mapping.keys()}
     allocation_totals["Other"] = 0
     total_investment = 0
+    zero_prefixes = tuple(zero_balance_accounts_config)
+    category_trie = build_prefix_trie(categories_mapping)
 
-    for entry in balance_sheet_data:
-        account = entry["account"]
-        amount = entry["amount"]
-
-        if is_zero_account(account, zero_balance_accounts_config):
+    balance_sheet_frame = to_balance_frame(balance_sheet_data)
+    for account, amount in zip(
+        balance_sheet_frame["account"].tolist(), balance_sheet_frame["amount"].tolist()
+    ):
+        if is_zero_account(account, zero_prefixes):
             continue
 
         if not account.startswith("Assets"):
             continue
 
-        matched = False
-        for name, prefix in categories_mapping.items():
-            if account.startswith(prefix):
-                allocation_totals[name] += amount
-                matched = True
-                break
-
-        if not matched:
+        name = match_prefix(category_trie, account)
+        if name is not None:
+            allocation_totals[name] += amount
+        else:
             print(
                 f"{RED_BOLD}WARNING: Unmatched account -> "
                 f"Account: {account}, Amount: {amount}{RESET}"
@@ -223,5 +305,5 @@ def calculate_investment_allocation(
             }
         )
 
-    allocation_data.sort(key=lambda x: x["Amount"], reverse=True)
+    allocation_data.sort(key=itemgetter("Amount"), reverse=True)
     return allocation_data
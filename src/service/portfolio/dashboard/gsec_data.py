@@ -1,10 +1,11 @@
+import atexit
 import concurrent.futures
+import os
 import sys
-from collections import Counter, defaultdict
-from functools import partial
+from collections import Counter
+from functools import lru_cache
 
 import pandas as pd
-from sortedcontainers import SortedDict
 
 from src.data.config import GSEC_DETAILS_FILE, QUANTITY_LAG_DAYS
 from src.service.portfolio.ledger.ledger_cli_output_parser import (
@@ -19,6 +20,11 @@ from src.service.util.date_util import parse_indian_date_format
 from src.service.util.holiday_calculator import next_market_day
 from src.service.util.xirr_calculator import xirr
 
+# fewer commodities than this are computed in-process
+PARALLEL_COMMODITY_THRESHOLD = 4
+_process_pool = None
+_process_pool_workers = 0
+
 gsec_maturity_date_override_df = pd.read_csv(GSEC_DETAILS_FILE)
 gsec_maturity_date_override_df.columns = (
     gsec_maturity_date_override_df.columns.str.strip()
@@ -33,18 +39,16 @@ pd.set_option("display.max_colwidth", None)
 pd.set_option("display.width", None)
 
 
+# register dates repeat across postings, memoize on the raw value
+@lru_cache(maxsize=4096, typed=True)
 def normalize_date(date_value):
     date_obj = parse_indian_date_format(date_value)
     return next_market_day(date_obj, QUANTITY_LAG_DAYS)
 
 
-def compute_for_commodity(commodity, report, ledger_files, account_name):
-    register_data = get_ledger_cli_output_by_config(
-        report["register"], ledger_files, commodity, "gsec_register"
-    )
-
+def compute_for_commodity(commodity, register_data):
     # generate date and total running quantity
-    cashflow_dates_and_quantity = SortedDict()
+    cashflow_dates_and_quantity = {}
     total_investment = 0
     total_quantity = 0
     for entry in register_data:
@@ -74,7 +78,7 @@ def compute_for_commodity(commodity, report, ledger_files, account_name):
     coupon_frequency = float(row["COUPON FREQUENCY"])
     isin = row["ISIN"]
     face_value = float(row["FACE VALUE"])
-    first_date = min(cashflow_dates_and_quantity.keys())
+    first_date = min(cashflow_dates_and_quantity)
     for d in generate_coupon_dates(first_date, maturity_date, coupon_frequency):
         slot = cashflow_dates_and_quantity.setdefault(d, {})
         slot.setdefault("quantity", 0)
@@ -84,11 +88,14 @@ def compute_for_commodity(commodity, report, ledger_files, account_name):
         market_shifted(maturity_date),
         {"quantity": 0, "coupon_date": True, "maturity": True},
     )
+
+    # sort once after all inserts, coupon and principal are applied in date order
+    cashflow_dates_and_quantity = dict(sorted(cashflow_dates_and_quantity.items()))
     apply_coupon_and_principal(
         cashflow_dates_and_quantity, coupon_rate, coupon_frequency, face_value
     )
 
-    cashflow_dates = list(cashflow_dates_and_quantity.keys())
+    cashflow_dates = list(cashflow_dates_and_quantity)
     total_cashflows = [
         entry.get("total_cashflow", 0.0)
         for entry in cashflow_dates_and_quantity.values()
@@ -130,49 +137,38 @@ def calculate_gsec_individual_xirr_report_data(
         for xirr_data, _ in results:
             xirr_rows.append(xirr_data)
 
-        # Build Pivoted Cashflow Table
-        all_dates = set()
-        symbol_cashflow_map = {}
-        portfolio_cashflow_map = defaultdict(float)
-
+        # Build Pivoted Cashflow Table, one column per symbol and one row per
+        # date, dates a symbol has no cashflow on are filled with 0
+        total_cashflow_by_symbol = {}
+        coupon_payment_by_symbol = {}
         for xirr_data, cashflow_data in results:
             symbol = xirr_data["SYMBOL"]
-            symbol_cashflow_map[symbol] = {}
-
-            for dt, entry in cashflow_data.items():
-                cashflow_value = round(entry.get("total_cashflow", 0.0), 2)
-                symbol_cashflow_map[symbol][dt] = entry
-                all_dates.add(dt)
-                portfolio_cashflow_map[dt] += cashflow_value
-
-        sorted_dates = sorted(all_dates)
-        sorted_symbols = sorted(symbol_cashflow_map.keys())
-
-        cashflow_rows = []
-        coupon_rows = []
-        for dt in sorted_dates:
-            row = {"DATE": dt}
-            coupon_row = {"DATE": dt}
-            payday = False
-            for symbol in sorted_symbols:
-                entry = symbol_cashflow_map[symbol].get(dt, {})
-                total_cashflow = round(entry.get("total_cashflow", 0.0), 2)
-                coupon_payment = round(entry.get("coupon_payment", 0.0), 2)
-
-                row[symbol] = total_cashflow
-                coupon_row[symbol] = coupon_payment
-                # If any symbol pays coupon then PAY DAY = True
-                if coupon_payment > 0:
-                    payday = True
-            row["PAY DAY"] = payday
-            cashflow_rows.append(row)
-            coupon_rows.append(coupon_row)
-
-        portfolio_dates = []
-        portfolio_amounts = []
-        for dt in sorted(portfolio_cashflow_map.keys()):
-            portfolio_dates.append(dt)
-            portfolio_amounts.append(portfolio_cashflow_map[dt])
+            total_cashflow_by_symbol[symbol] = {
+                dt: round(entry.get("total_cashflow", 0.0), 2)
+                for dt, entry in cashflow_data.items()
+            }
+            coupon_payment_by_symbol[symbol] = {
+                dt: round(entry.get("coupon_payment", 0.0), 2)
+                for dt, entry in cashflow_data.items()
+            }
+
+        sorted_symbols = sorted(total_cashflow_by_symbol)
+        cashflow_df = (
+            pd.DataFrame(total_cashflow_by_symbol, columns=sorted_symbols)
+            .sort_index()
+            .fillna(0.0)
+        )
+        coupon_df = pd.DataFrame(
+            coupon_payment_by_symbol, index=cashflow_df.index, columns=sorted_symbols
+        ).fillna(0.0)
+
+        portfolio_dates = cashflow_df.index.tolist()
+        portfolio_amounts = cashflow_df.sum(axis=1).tolist()
+
+        # If any symbol pays coupon then PAY DAY = True
+        cashflow_df["PAY DAY"] = (coupon_df > 0).any(axis=1)
+        cashflow_rows = cashflow_df.rename_axis("DATE").reset_index().to_dict("records")
+        coupon_rows = coupon_df.rename_axis("DATE").reset_index().to_dict("records")
 
         portfolio_xirr_value = 0.0
         if portfolio_dates and portfolio_amounts and len(portfolio_dates) > 1:
@@ -200,24 +196,63 @@ def calculate_gsec_individual_xirr_report_data(
     return gsec_individual_xirr_reports_data
 
 
+def get_process_pool(workers):
+    """
+    Process pool shared by every report in this run, created on first use so
+    workers are started once instead of per report. It holds at most one
+    worker per commodity (capped at the cpu count) and is only replaced when a
+    later report needs more workers than it has.
+    """
+    global _process_pool, _process_pool_workers
+    workers = min(workers, os.cpu_count() or 1)
+    if _process_pool is None or _process_pool_workers < workers:
+        if _process_pool is None:
+            atexit.register(shutdown_process_pool)
+        else:
+            _process_pool.shutdown()
+        _process_pool = concurrent.futures.ProcessPoolExecutor(workers)
+        _process_pool_workers = workers
+    return _process_pool
+
+
+def shutdown_process_pool():
+    global _process_pool, _process_pool_workers
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+        _process_pool_workers = 0
+
+
 def generate_gsec_portfolio_df(ledger_files, report):
     # Get all the commodities
     commodities = get_ledger_cli_output_by_config(
         report["list_commodity"], ledger_files, None, "commodities"
     )
 
-    # Parallelize computation for each commodity
+    # One register run for every G-Sec, bucketed by commodity
     xirr_output = []
     if commodities:
-        compute_func = partial(
-            compute_for_commodity,
-            report=report,
-            ledger_files=ledger_files,
-            account_name=report["account_name"],
+        register_by_commodity = get_ledger_cli_output_by_config(
+            report["register"], ledger_files, None, "gsec_register_by_commodity"
         )
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            results = executor.map(compute_func, commodities)
-            xirr_output = [r for r in results if r is not None]
+
+        # a commodity without register rows has no cashflows to compute on
+        missing = [c for c in commodities if not register_by_commodity.get(c)]
+        for commodity in missing:
+            print(f"WARNING: No register rows for G-Sec '{commodity}', skipping it")
+        commodities = [c for c in commodities if c not in missing]
+        register_data = [register_by_commodity[c] for c in commodities]
+
+        # XIRR work is pure python, spread it over processes only when there
+        # are enough commodities to pay for the worker startup
+        if len(commodities) < PARALLEL_COMMODITY_THRESHOLD:
+            xirr_output = list(map(compute_for_commodity, commodities, register_data))
+        else:
+            xirr_output = list(
+                get_process_pool(len(commodities)).map(
+                    compute_for_commodity, commodities, register_data
+                )
+            )
 
     return xirr_output
 
@@ -345,7 +380,9 @@ def validate_gsec_coupons(cashflow_rows, ledger_files, gsec_ci_validator, thresh
             f"{gsec_ci_validator.get('name', '')}, till date: {max_paid_date}"
         )
     else:
-        result.sort(key=lambda x: (str(x["DATE"]) if x["DATE"] else "", x["GSEC"] or ""))
+        result.sort(
+            key=lambda x: (str(x["DATE"]) if x["DATE"] else "", x["GSEC"] or "")
+        )
         print(
             f"✅ All GSec coupons reconciled for {gsec_ci_validator['name']}, till date: {max_paid_date}"
         )
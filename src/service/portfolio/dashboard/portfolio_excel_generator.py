@@ -1,8 +1,8 @@
+import concurrent.futures
 import sys
 from datetime import date, datetime
 
 import xlsxwriter
-import yaml
 
 from src.data.config import (
     DASHBOARD_CONFIG_PATH,
@@ -21,6 +21,8 @@ from src.service.portfolio.dashboard.dashboard_data import (
     calculate_category_tables_data,
     calculate_investment_allocation,
     calculate_summary_data,
+    to_balance_frame,
+    zero_balance_totals,
 )
 from src.service.portfolio.dashboard.gsec_data import (
     calculate_gsec_individual_xirr_report_data,
@@ -31,6 +33,7 @@ from src.service.portfolio.dashboard.retirement_data import (
 from src.service.portfolio.ledger.ledger_cli_output_parser import (
     get_ledger_cli_output_by_config,
 )
+from src.service.util.config_loader import load_yaml_config
 
 # Fields
 amount_fields = [
@@ -141,12 +144,10 @@ def print_table(
     percent_fields_upper = {field.upper() for field in percent_fields}
     link_fields_upper = {field.upper() for field in link_fields}
 
-    # Extract headers
-    headers = []
-    for entry in data:
-        for key in entry.keys():
-            if key != "_style" and key not in headers:
-                headers.append(key)
+    # Extract headers, dict keeps first-seen order with O(1) membership checks
+    headers = list(dict.fromkeys(key for entry in data for key in entry))
+    if "_style" in headers:
+        headers.remove("_style")
 
     row = start_row
 
@@ -155,30 +156,61 @@ def print_table(
         worksheet.write(row, start_col + col, header, layout["header_fmt"])
     row += 1
 
+    def write_link(row, col, value, fmt):
+        worksheet.write_url(row, col, value, fmt, string="View")
+
+    def write_percent(row, col, value, fmt):
+        worksheet.write(row, col, value * 100, fmt)
+
+    def write_date(row, col, value, fmt):
+        worksheet.write_datetime(
+            row, col, datetime.combine(value, datetime.min.time()), fmt
+        )
+
+    # Writer and base format only depend on the header, decide them once.
+    # Dates are the one value dependent case, they keep the column writer
+    # for links and percents and switch to write_datetime otherwise.
+    col_writers = []
+    col_formats = []
+    col_date_formats = []
+    for header in headers:
+        header_upper = header.upper()
+        if header_upper in link_fields_upper:
+            col_writers.append(write_link)
+            col_formats.append(layout.get("link_fmt"))
+            col_date_formats.append(None)
+        elif header_upper in percent_fields_upper:
+            col_writers.append(write_percent)
+            col_formats.append(layout["percent_fmt"])
+            col_date_formats.append(None)
+        elif header_upper in amount_fields_upper:
+            col_writers.append(worksheet.write)
+            col_formats.append(layout["amount_fmt"])
+            col_date_formats.append(layout["amount_fmt"])
+        else:
+            col_writers.append(worksheet.write)
+            col_formats.append(layout["account_fmt"])
+            col_date_formats.append(layout["date_fmt"])
+
     format_cache = {}
 
-    # Write rows
+    # Write rows, each entry is read once into a tuple ordered like headers
     for entry in data:
         style_map = entry.get("_style", {})
+        values = tuple(entry.get(header, "") for header in headers)
 
-        for col, header in enumerate(headers):
-            value = entry.get(header, "")
-            header_upper = header.upper()
-
+        for col, value in enumerate(values):
             if value is None:
-                base = layout["account_fmt"]
-            elif header_upper in link_fields_upper:
-                base = layout.get("link_fmt")
-            elif header_upper in percent_fields_upper:
-                base = layout["percent_fmt"]
-            elif header_upper in amount_fields_upper:
-                base = layout["amount_fmt"]
-            elif isinstance(value, (datetime, date)):
-                base = layout["date_fmt"]
+                # Handle None values safely
+                writer, base, value = worksheet.write, layout["account_fmt"], ""
+            elif col_date_formats[col] is not None and isinstance(
+                value, (datetime, date)
+            ):
+                writer, base = write_date, col_date_formats[col]
             else:
-                base = layout["account_fmt"]
+                writer, base = col_writers[col], col_formats[col]
 
-            style = style_map.get(header)
+            style = style_map.get(headers[col]) if style_map else None
             if style:
                 key = (id(base), tuple(sorted(style.items())))
                 if key not in format_cache:
@@ -189,36 +221,7 @@ def print_table(
             else:
                 fmt = base
 
-            # Handle None values safely
-            if value is None:
-                worksheet.write(row, start_col + col, "", fmt)
-                continue
-
-            # Link fields
-            if header_upper in link_fields_upper:
-                worksheet.write_url(
-                    row,
-                    start_col + col,
-                    value,
-                    fmt,
-                    string="View",
-                )
-
-            # Percent fields
-            elif header_upper in percent_fields_upper:
-                worksheet.write(row, start_col + col, value * 100, fmt)
-
-            elif isinstance(value, (datetime, date)):
-                worksheet.write_datetime(
-                    row,
-                    start_col + col,
-                    datetime.combine(value, datetime.min.time()),
-                    fmt,
-                )
-
-            # Default format
-            else:
-                worksheet.write(row, start_col + col, value, fmt)
+            writer(row, start_col + col, value, fmt)
         row += 1
 
     row += 1  # spacing after table
@@ -229,13 +232,10 @@ def print_table(
 # main
 if __name__ == "__main__":
 
-    with open(DASHBOARD_CONFIG_PATH, "r") as f:
-        dashboard_config = yaml.safe_load(f)
-
-    with open(DASHBOARD_LAYOUT_CONFIG_PATH, "r") as f:
-        dashboard_layout_config = yaml.safe_load(f)
+    dashboard_config = load_yaml_config(DASHBOARD_CONFIG_PATH)
+    dashboard_layout_config = load_yaml_config(DASHBOARD_LAYOUT_CONFIG_PATH)
 
-    zero_balance_accounts_config = (
+    zero_balance_accounts_config = tuple(
         dashboard_config["dashboard"]["zero_balance_accounts"] or []
     )
     zero_balance_accounts_pending_config = (
@@ -251,29 +251,31 @@ if __name__ == "__main__":
     retirement_tracker_config = dashboard_config["dashboard"]["retirement_tracker"]
     mutual_funds = dashboard_config["dashboard"]["mutual_funds"]
     nifty_index_threshold = dashboard_config["dashboard"]["nifty_index"]["threshold"]
-    ledger_files = {LEDGER_ME_MAIN, LEDGER_MOM_MAIN, LEDGER_PAPA_MAIN}
-
-    # Balance Sheet data
-    balance_sheet_data = get_ledger_cli_output_by_config(
-        dashboard_config["dashboard"]["balance_sheet"],
-        ledger_files,
-    )
+    ledger_files = (LEDGER_ME_MAIN, LEDGER_MOM_MAIN, LEDGER_PAPA_MAIN)
+
+    # Balance Sheet and Income Statement data, two independent ledger runs
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        balance_sheet_future = executor.submit(
+            get_ledger_cli_output_by_config,
+            dashboard_config["dashboard"]["balance_sheet"],
+            ledger_files,
+        )
+        income_statement_future = executor.submit(
+            get_ledger_cli_output_by_config,
+            dashboard_config["dashboard"]["income_statement"],
+            ledger_files,
+        )
+        balance_sheet_data = balance_sheet_future.result()
+        income_statement_data = income_statement_future.result()
 
-    # Income Statement Data
-    income_statement_data = get_ledger_cli_output_by_config(
-        dashboard_config["dashboard"]["income_statement"],
-        ledger_files,
-    )
+    balance_sheet_frame = to_balance_frame(balance_sheet_data)
 
     # Zero Balance Validation
     print("\nValidating Zero Balance Accounts")
-    for zero_account in zero_balance_accounts_config:
-        balance = sum(
-            entry["amount"]
-            for entry in balance_sheet_data
-            if entry["account"].startswith(zero_account)
-        )
-
+    zero_balances = zero_balance_totals(
+        balance_sheet_frame, zero_balance_accounts_config
+    )
+    for zero_account, balance in zero_balances.items():
         print(f"Account: {zero_account} has balance of {balance}")
         if abs(balance) > 0.01:
             # If account is in pending list, ignore but show in red
@@ -291,7 +293,7 @@ if __name__ == "__main__":
 
     # Metrics & Summary Data
     summary_data = calculate_summary_data(
-        balance_sheet_data=balance_sheet_data,
+        balance_sheet_data=balance_sheet_frame,
         income_statement_data=income_statement_data,
         zero_balance_accounts_config=zero_balance_accounts_config,
         mutual_funds=mutual_funds,
@@ -302,14 +304,14 @@ if __name__ == "__main__":
 
     # Allocation Data
     allocation_data = calculate_investment_allocation(
-        balance_sheet_data,
+        balance_sheet_frame,
         categories,
         zero_balance_accounts_config,
     )
 
     # Account - Amount Table Data
     category_tables_data = calculate_category_tables_data(
-        balance_sheet_data, categories, zero_balance_accounts_config
+        balance_sheet_frame, categories, zero_balance_accounts_config
     )
 
     # Retirement Tracking Data
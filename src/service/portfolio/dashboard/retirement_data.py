@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def calculate_retirement_data(retirement_tracker_config):
     retirement_year = int(retirement_tracker_config["retirement_year"])
     end_year = int(retirement_tracker_config["end_year"])
@@ -8,13 +11,17 @@ def calculate_retirement_data(retirement_tracker_config):
     investment_amount = float(retirement_tracker_config["investment_amount"])
     retirement_data = []
 
-    for year in range(retirement_year, end_year):
-        number_of_years_since_retirement = year - retirement_year
-
-        inflation_adjusted_yearly_expenses = (
-            yearly_expenses * (1 + inflation) ** number_of_years_since_retirement
-        )
+    # Expenses only depend on the year, compute the whole column at once
+    years = np.arange(retirement_year, max(retirement_year, end_year))
+    number_of_years_since_retirement = years - retirement_year
+    inflation_adjusted_yearly_expenses = (
+        yearly_expenses * (1 + inflation) ** number_of_years_since_retirement
+    )
 
+    # The investment is a running balance, each year starts from the last one
+    for year, inflation_adjusted_yearly_expense in zip(
+        years.tolist(), inflation_adjusted_yearly_expenses.tolist()
+    ):
         investment_amount_current_year = investment_amount
         investment_future_value = investment_amount_current_year + (
             investment_amount_current_year * rate_of_interest
@@ -26,7 +33,7 @@ def calculate_retirement_data(retirement_tracker_config):
         investment_amount = (
             investment_future_value
             - tax_current_year
-            - inflation_adjusted_yearly_expenses
+            - inflation_adjusted_yearly_expense
         )
 
         retirement_data.append(
@@ -38,7 +45,7 @@ def calculate_retirement_data(retirement_tracker_config):
                 "BASE YEARLY EXPENSES": round(yearly_expenses, 2),
                 "INVESTMENT AMOUNT": round(investment_amount_current_year, 2),
                 "INFLATION ADJUSTED YEARLY EXPENSES": round(
-                    inflation_adjusted_yearly_expenses, 2
+                    inflation_adjusted_yearly_expense, 2
                 ),
                 "INCOME": round(income, 2),
                 "TAX AMOUNT": round(tax_current_year, 2),
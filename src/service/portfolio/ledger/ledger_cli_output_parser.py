@@ -1,13 +1,17 @@
+import re
+import shutil
 import subprocess
-
-import yaml
+import sys
+import tempfile
+from collections import defaultdict
+from functools import lru_cache
+from itertools import chain, pairwise
 
 from src.data.config import DASHBOARD_CONFIG_PATH
+from src.service.util.config_loader import load_yaml_config
 
-with open(DASHBOARD_CONFIG_PATH, "r") as f:
-    dashboard_config = yaml.safe_load(f)
-
-filter_not_commodities = dashboard_config["dashboard"]["commodities"]["filter_not"]
+# "<amount> <currency><gap><account>", the gap width encodes the account depth
+BALANCE_LINE_RE = re.compile(r"^[ \t]*(-?[\d,.]+) (\S+)( +)(\S.*?)[ \t]*$")
 
 
 def get_ledger_cli_output_by_config(
@@ -23,8 +27,7 @@ def get_ledger_cli_output_by_config(
     if end_date:
         cmd.extend(["--end", end_date])
 
-    for path in ledger_files:
-        cmd.extend(["-f", str(path)])
+    cmd.extend(ledger_file_flags(tuple(ledger_files)))
 
     if commodity:
         cmd.extend(["--limit", f'commodity=="{commodity}"'])
@@ -37,23 +40,22 @@ def get_ledger_cli_output_by_config(
         return parse_ledger_cli_register_output(output)
     if command_type.lower() == "gsec_register":
         return parse_ledger_cli_gsec_register_output(output)
+    if command_type.lower() == "gsec_register_by_commodity":
+        return parse_ledger_cli_gsec_register_by_commodity_output(output)
     else:
         all_accounts = parse_ledger_cli_balance_output(output)
 
-        accounts = [p["account"] for p in all_accounts]
-        account_set = set(accounts)
+        parent_accounts = find_parent_accounts(p["account"] for p in all_accounts)
 
-        filter_not_account = config.get("filter_not", [])
+        filter_not_account = set(config.get("filter_not") or [])
         us_accounts = config.get("us_account", [])
 
-        leaf_accounts = []
-        for p in all_accounts:
-            prefix = p["account"] + ":"
-            if (
-                not any(a.startswith(prefix) for a in account_set)
-                and p["account"] not in filter_not_account
-            ):
-                leaf_accounts.append(p)
+        leaf_accounts = [
+            p
+            for p in all_accounts
+            if p["account"] not in parent_accounts
+            and p["account"] not in filter_not_account
+        ]
 
         if us_accounts:
             cmd_no_basis = [c for c in cmd if c != "--basis"]
@@ -75,27 +77,76 @@ def get_ledger_cli_output_by_config(
         return leaf_accounts
 
 
+def find_parent_accounts(accounts):
+    """
+    Accounts that have at least one sub account.
+    Sorting on the ":" segments places every sub account right after its
+    parent, so only neighbours need to be compared.
+    """
+    ordered = sorted(set(accounts), key=lambda account: account.split(":"))
+    return {
+        account
+        for account, next_account in pairwise(ordered)
+        if next_account.startswith(account + ":")
+    }
+
+
+@lru_cache(maxsize=None)
+def ledger_file_flags(ledger_files):
+    """Build the ``-f <path>`` arguments once per distinct set of ledger files."""
+    return tuple(chain.from_iterable(("-f", str(path)) for path in ledger_files))
+
+
+@lru_cache(maxsize=None)
+def resolve_executable(name):
+    """
+    Absolute path of a command, subprocess only takes the posix_spawn path
+    (no fork of this process) for executables given with a directory.
+    """
+    return shutil.which(name) or name
+
+
 def run_ledger_cli_command(cmd):
+    """
+    Yield ledger's output lines while it is still running, so parsing overlaps
+    with ledger and the report is never held in memory as one string.
+    """
     print()
     print(" ".join(cmd))
-    result = subprocess.run(
-        cmd,
+    # stderr goes to a file, a full stderr pipe would stall ledger while we
+    # are still reading stdout
+    with tempfile.TemporaryFile(mode="w+") as stderr, subprocess.Popen(
+        [resolve_executable(cmd[0]), *cmd[1:]],
         stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
+        stderr=stderr,
         text=True,
         shell=False,
-    )
+        # our descriptors are non-inheritable already, keeping close_fds off
+        # lets posix_spawn be used
+        close_fds=False,
+    ) as process:
+        yield from process.stdout
 
-    if result.returncode != 0:
-        raise RuntimeError(result.stderr)
+        if process.wait() != 0:
+            stderr.seek(0)
+            raise RuntimeError(stderr.read())
 
-    return result.stdout.strip()
+
+def iter_lines(output):
+    """Lines of ledger output, given either as a whole string or as a stream."""
+    return output.splitlines() if isinstance(output, str) else output
+
+
+def get_filter_not_commodities():
+    """Commodities hidden from commodity listings, read when first needed."""
+    dashboard_config = load_yaml_config(DASHBOARD_CONFIG_PATH)
+    return dashboard_config["dashboard"]["commodities"]["filter_not"]
 
 
 def parse_ledger_cli_commodities_output(output):
     parsed_lines = []
-    excluded_items = set(filter_not_commodities or [])
-    for line in output.splitlines():
+    excluded_items = set(get_filter_not_commodities() or [])
+    for line in iter_lines(output):
         line = line.strip().replace('"', "")
         if not line:
             continue
@@ -107,9 +158,8 @@ def parse_ledger_cli_commodities_output(output):
 
 def parse_ledger_cli_gsec_register_output(output):
     parsed_lines = []
-    lines = output.splitlines()
     current_date = None
-    for line in lines:
+    for line in iter_lines(output):
         line = line.strip()
         if not line:
             continue
@@ -128,11 +178,36 @@ def parse_ledger_cli_gsec_register_output(output):
     return parsed_lines
 
 
+def parse_ledger_cli_gsec_register_by_commodity_output(output):
+    """
+    Same rows as parse_ledger_cli_gsec_register_output, grouped by the
+    commodity of the quantity column so one register run serves every G-Sec.
+    """
+    parsed_lines = defaultdict(list)
+    for line in iter_lines(output):
+        line = line.strip()
+        if not line:
+            continue
+
+        arr = line.split("|")
+        arr_filtered = [x.strip() for x in arr if x]
+
+        current_date = arr_filtered[0]
+        quantity_str, _, commodity = arr_filtered[-2].partition(" ")
+        quantity = float(quantity_str.replace(",", ""))
+        amount = float(arr_filtered[-1].split(" ")[0].replace(",", ""))
+
+        if current_date:
+            parsed_lines[commodity.strip().strip('"')].append(
+                {"date": current_date, "quantity": quantity, "amount": amount}
+            )
+    return dict(parsed_lines)
+
+
 def parse_ledger_cli_register_output(output):
     parsed_lines = []
-    lines = output.splitlines()
     current_date = None
-    for line in lines:
+    for line in iter_lines(output):
         line = line.strip()
         if not line:
             continue
@@ -162,24 +237,19 @@ def parse_ledger_cli_register_output(output):
 def parse_ledger_cli_balance_output(output):
     parsed_lines = []
     stack = []
-    lines = output.splitlines()
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        if line.startswith("---") or line.startswith("0 "):
+    for line in iter_lines(output):
+        match = BALANCE_LINE_RE.match(line)
+        if not match:
             continue
 
-        arr = line.split(" ")
-        arr_filtered = [x for x in arr if x]
-        if len(arr_filtered) < 3:
+        amount_str, currency, gap, account_name = match.groups()
+        if amount_str == "0":
             continue
 
-        amount = float(arr_filtered[0].replace(",", ""))
-        currency = arr_filtered[1]
-        account_name = " ".join(arr_filtered[2:])
+        amount = float(amount_str.replace(",", ""))
 
-        level = max(0, len(arr) - 2 - (len(arr_filtered) - 1)) // 2
+        # ledger indents sub accounts by two spaces after the two space gap
+        level = max(0, len(gap) - 2) // 2
 
         if level < len(stack):
             stack = stack[:level]
@@ -189,7 +259,8 @@ def parse_ledger_cli_balance_output(output):
         else:
             stack[level] = account_name
 
-        full_account = ":".join(stack)
+        # accounts are compared and hashed repeatedly downstream
+        full_account = sys.intern(":".join(stack))
 
         parsed_lines.append(
             {
@@ -1,8 +1,12 @@
+import csv
 import os
+import re
 import sys
 import traceback
 from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
 
 from src.data.config import (
     LEDGER_ME_DIR,
@@ -12,10 +16,21 @@ from src.data.config import (
     TRANSACTION_MOM_DIR,
     TRANSACTION_PAPA_DIR,
 )
+from src.service.util.csv_util import non_comment_lines
 
 # Round to exactly 6 decimal places
 SIX_DP = Decimal("0.000001")
 
+CSV_READ_BUFFER_SIZE = 1 << 20
+
+# Investment accounts, matched anywhere in the account name
+INVESTMENT_ACCOUNT_RE = re.compile(
+    r"Assets:Investments:(?:Equity|MutualFunds|Options|GSec):"
+)
+EXCLUDE_ACCOUNTS = {
+    "Assets:Investments:MutualFunds:ICICI",
+}
+
 
 def transaction_sort_key(row_parts):
     """
@@ -66,6 +81,7 @@ def fmt(value: Decimal) -> Decimal:
     return value.quantize(SIX_DP, rounding=ROUND_HALF_UP)
 
 
+@lru_cache(maxsize=1024)
 def is_equity_account(account: str) -> bool:
     """
     Any account containing investment instruments.
@@ -75,21 +91,13 @@ def is_equity_account(account: str) -> bool:
       - :MutualFunds:
       - :Options:
       - :GSec:
-    """
-    INVESTMENT_MARKERS = (
-        "Assets:Investments:Equity:",
-        "Assets:Investments:MutualFunds:",
-        "Assets:Investments:Options:",
-        "Assets:Investments:GSec:",
-    )
-    EXCLUDE_ACCOUNTS = {
-        "Assets:Investments:MutualFunds:ICICI",
-    }
 
+    The same few accounts come up on every row, so results are cached.
+    """
     if account in EXCLUDE_ACCOUNTS:
         return False
 
-    return any(marker in account for marker in INVESTMENT_MARKERS)
+    return INVESTMENT_ACCOUNT_RE.search(account) is not None
 
 
 def parse_amount(value: str):
@@ -98,7 +106,7 @@ def parse_amount(value: str):
 
     Rules:
     - First token is always the numeric amount
-    - Everything after the first space is the unit
+    - Everything after the first run of whitespace is the unit
     - If unit is wrapped in double quotes, treat it as one unit
 
     Examples:
@@ -111,32 +119,39 @@ def parse_amount(value: str):
         '1 "AAPL 2023-10-23 Call 195.00"'
             -> (1, "AAPL 2023-10-23 Call 195.00")
     """
-    value = value.strip()
     # Split only ONCE: amount | rest
-    amount_str, unit_part = value.split(None, 1)
+    value = value.strip()
+    amount_str, _, unit_part = value.partition(" ")
+    # partition only splits on a plain space, tabs and other whitespace
+    # (the only non printable characters here) take the slower split
+    if not unit_part or not amount_str.isprintable():
+        parts = value.split(None, 1)
+        if len(parts) != 2:
+            raise ValueError(f"Missing unit in amount: {value}")
+        amount_str, unit_part = parts
 
     amount = Decimal(amount_str)
 
     # Remove surrounding double quotes if present
-    unit_part = unit_part.strip()
+    unit_part = unit_part.lstrip()
     if unit_part.startswith('"') and unit_part.endswith('"'):
         unit_part = unit_part[1:-1]
 
     return amount, unit_part
 
 
-def select_lot(lots_deque, method: str):
+def select_lot(lot_costs, method: str):
     """
-    Select lot based on lot selection method.
+    Index of the lot to sell from, based on lot selection method.
     """
     method = (method or "FIFO").upper()
 
     if method == "FIFO":
-        return lots_deque[0]
+        return 0
     if method == "LIFO":
-        return lots_deque[-1]
+        return len(lot_costs) - 1
     if method == "HIFO":
-        return max(lots_deque, key=lambda lot: lot["cost"])
+        return max(range(len(lot_costs)), key=lot_costs.__getitem__)
 
     raise ValueError(f"Unsupported lot selection method: {method}")
 
@@ -160,10 +175,11 @@ def csv_to_ledger_year_range(
         end_year: last year to process
     """
 
-    # FIFO lot storage
+    # FIFO lot storage, one lot is the same index in both deques
     # Key: (equity_account, symbol)
-    # Value: deque of lots, each lot is a dict: {"qty": Decimal, "cost": Decimal}
-    lots = defaultdict(deque)
+    # Value: deque of lot quantities / deque of lot costs per unit (Decimal)
+    lot_qtys = defaultdict(deque)
+    lot_costs = defaultdict(deque)
 
     for year in range(start_year, end_year + 1):
         csv_path = f"{transaction_dir}/{year}.csv"
@@ -180,17 +196,21 @@ def csv_to_ledger_year_range(
         # -------------------------
         # Read CSV and store rows
         # -------------------------
-        with open(csv_path, "r", encoding="utf-8") as f:
+        # one read call pulls in a whole year of transactions
+        with open(
+            csv_path, "r", encoding="utf-8", newline="", buffering=CSV_READ_BUFFER_SIZE
+        ) as f:
             next(f, None)  # skip CSV header
 
-            for row in f:
-                row = row.strip()
-                if not row or row.startswith("#"):
-                    continue
+            # Comment and blank lines are dropped before tokenizing, and
+            # QUOTE_NONE splits on every "," and keeps quotes in the fields
+            for parts in csv.reader(non_comment_lines(f), quoting=csv.QUOTE_NONE):
+                # same as stripping the whole line before splitting it
+                parts[0] = parts[0].lstrip()
+                parts[-1] = parts[-1].rstrip()
 
-                parts = row.split(",")
                 if len(parts) != 9:
-                    raise RuntimeError(f"Malformed row: {row}")
+                    raise RuntimeError(f"Malformed row: {','.join(parts)}")
 
                 rows.append(parts)
 
@@ -221,27 +241,27 @@ def csv_to_ledger_year_range(
             # Ledger transaction header
             lines.append(f"{date} {description}")
 
-            # Parse amounts and units
-            from_amt, from_unit = parse_amount(from_value)
-            to_amt, to_unit = parse_amount(to_value)
-
             # -------------------------
             # BUY Equity Transaction
             # Cash -> Equity
+            # Amounts are only parsed for equity rows, the rest are copied as is
             # -------------------------
             if is_equity_account(to_account):
+                from_amt, _ = parse_amount(from_value)
+                to_amt, to_unit = parse_amount(to_value)
                 qty = to_amt  # Shares bought
                 symbol = to_unit  # e.g., ACLS, INFY
                 total_cost = abs(from_amt)  # Cash paid
                 cost_per_unit = fmt(total_cost / qty)
 
                 # Push lot into FIFO queue
-                lots[(to_account, symbol)].append({"qty": qty, "cost": cost_per_unit})
+                lot_qtys[(to_account, symbol)].append(qty)
+                lot_costs[(to_account, symbol)].append(cost_per_unit)
                 currency = from_value.split()[-1]
 
-                lines.append(f"    {from_account:<55}{fmt(from_amt)} {currency}")
+                lines.append(f"    {from_account.ljust(55)}{fmt(from_amt)} {currency}")
                 lines.append(
-                    f'    {to_account:<55}{qty} "{symbol}" @ {cost_per_unit} {currency}'
+                    f'    {to_account.ljust(55)}{qty} "{symbol}" @ {cost_per_unit} {currency}'
                 )
             # -------------------------
             # SELL Equity Transaction
@@ -249,6 +269,8 @@ def csv_to_ledger_year_range(
             # Consume FIFO lots
             # -------------------------
             elif is_equity_account(from_account):
+                from_amt, from_unit = parse_amount(from_value)
+                to_amt, _ = parse_amount(to_value)
                 sell_qty = abs(from_amt)
                 symbol = from_unit
                 proceeds = to_amt
@@ -257,43 +279,50 @@ def csv_to_ledger_year_range(
                 lot_key = (from_account, symbol)
 
                 # sell quantity from deque until it is greater than 0
+                qtys = lot_qtys[lot_key]
+                costs = lot_costs[lot_key]
                 remaining = sell_qty
                 while remaining > 0:
-                    if not lots[lot_key]:
+                    if not qtys:
                         print(
                             f" Not enough shares to sell "
                             f"{sell_qty} {symbol} from {from_account} on date: {date}"
                         )
                         sys.exit(1)
 
-                    lot = select_lot(lots[lot_key], lot_selection_method)
-                    take = min(lot["qty"], remaining)
+                    i = select_lot(costs, lot_selection_method)
+                    lot_qty = qtys[i]
+                    take = min(lot_qty, remaining)
 
                     lines.append(
-                        f"    {from_account:<55}-"
+                        f"    {from_account.ljust(55)}-"
                         f'{take} "{symbol}" '
-                        f"{{{lot['cost']} {currency}}} "
+                        f"{{{costs[i]} {currency}}} "
                         f"@ {sell_price} {currency}"
                     )
 
                     # remove used quantity from deque
-                    lot["qty"] -= take
                     remaining -= take
-                    if lot["qty"] == 0:
-                        lots[lot_key].remove(lot)
+                    if lot_qty == take:
+                        del qtys[i]
+                        del costs[i]
+                    else:
+                        qtys[i] = lot_qty - take
 
                 # Cash received
-                lines.append(f"    {to_account:<55}{fmt(proceeds)} {currency}")
+                lines.append(f"    {to_account.ljust(55)}{fmt(proceeds)} {currency}")
             # Non-Equity Transactions
             else:
-                lines.append(f"    {from_account:<55}{from_value}")
-                lines.append(f"    {to_account:<55}{to_value}")
+                lines.append(f"    {from_account.ljust(55)}{from_value}")
+                lines.append(f"    {to_account.ljust(55)}{to_value}")
 
             # append adjustment posting
             if adjustment_account:
                 if adjustment_value:
                     # explicit posting: account + amount
-                    lines.append(f"    {adjustment_account:<55}{adjustment_value}")
+                    lines.append(
+                        f"    {adjustment_account.ljust(55)}{adjustment_value}"
+                    )
                 else:
                     # implicit balancing posting: account only
                     lines.append(f"    {adjustment_account}")
@@ -313,26 +342,25 @@ def csv_to_ledger_year_range(
 # Entry Point
 if __name__ == "__main__":
     try:
-        csv_to_ledger_year_range(
-            TRANSACTION_ME_DIR,
-            LEDGER_ME_DIR,
-            start_year=2020,
-            end_year=2026,
-        )
-
-        csv_to_ledger_year_range(
-            TRANSACTION_MOM_DIR,
-            LEDGER_MOM_DIR,
-            start_year=2020,
-            end_year=2026,
-        )
-
-        csv_to_ledger_year_range(
-            TRANSACTION_PAPA_DIR,
-            LEDGER_PAPA_DIR,
-            start_year=2020,
-            end_year=2026,
-        )
+        # each person's lots only depend on their own transactions, so the
+        # three directories are converted side by side
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            futures = [
+                executor.submit(
+                    csv_to_ledger_year_range,
+                    transaction_dir,
+                    ledger_dir,
+                    start_year=2020,
+                    end_year=2026,
+                )
+                for transaction_dir, ledger_dir in [
+                    (TRANSACTION_ME_DIR, LEDGER_ME_DIR),
+                    (TRANSACTION_MOM_DIR, LEDGER_MOM_DIR),
+                    (TRANSACTION_PAPA_DIR, LEDGER_PAPA_DIR),
+                ]
+            ]
+            for future in futures:
+                future.result()
 
     except Exception:
         print("Error occurred:", file=sys.stderr)
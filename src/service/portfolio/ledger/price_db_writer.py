@@ -1,17 +1,25 @@
+import concurrent.futures
 import csv
+import gzip
 import io
 import os
+import pickle
+import re
 import sys
+import threading
 import time
-from datetime import datetime
-from typing import Dict
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 import pandas as pd
 import requests
-import yaml
 import yfinance as yf
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from src.data.config import (
+    CACHE_DIR,
     DASHBOARD_CONFIG_PATH,
     LEDGER_IND_COMMODITY_LIST,
     LEDGER_IND_MF_COMMODITY_LIST,
@@ -19,15 +27,27 @@ from src.data.config import (
     LEDGER_US_COMMODITY_LIST,
     NSE_GSEC_LIVE_DATA_DIR,
 )
+from src.service.util.config_loader import load_yaml_config
 from src.service.util.csv_util import read_all_dated_csv_files_from_folder
 
 UPSTOX_ACCESS_TOKEN = os.getenv("UPSTOX_ACCESS_TOKEN")
 CRYPTO_LIST = ["XRP", "BTC", "CORECHAIN", "NEAR", "FLR"]
-nse_gsec_files = read_all_dated_csv_files_from_folder(NSE_GSEC_LIVE_DATA_DIR)
+# minimum seconds between two Upstox candle requests, across all threads
+UPSTOX_REQUEST_INTERVAL = 3
+PRICE_FETCH_WORKERS = 4
+# (connect, read) seconds for every HTTP request
+HTTP_TIMEOUT = (5, 30)
+# quoted name of a "commodity" line, skipping options, G-Secs and mutual funds
+COMMODITY_LINE_RE = re.compile(
+    r'^[^\S\n]*(?!.*; (?:Option|GSec|Mutual Fund))commodity[^"\n]*"([^"\n]*)',
+    re.M,
+)
 
 
-with open(DASHBOARD_CONFIG_PATH, "r") as f:
-    dashboard_config = yaml.safe_load(f)
+@lru_cache(maxsize=1)
+def get_nse_gsec_files():
+    """NSE G-Sec live data, read on first use instead of at import."""
+    return read_all_dated_csv_files_from_folder(NSE_GSEC_LIVE_DATA_DIR)
 
 
 def read_commodity_file(file_path):
@@ -42,29 +62,13 @@ def read_commodity_file(file_path):
     - normalize to UPPERCASE here
     """
 
-    commodities = set()
-
     if not file_path.exists():
-        return commodities
-
-    with open(file_path) as f:
-        for line in f:
-            line = line.strip()
-
-            if not line or line.startswith(";"):
-                continue
-
-            if not line.startswith("commodity"):
-                continue
+        return set()
 
-            if "; Option" in line or "; GSec" in line or "; Mutual Fund" in line:
-                continue
-
-            if '"' in line:
-                name = line.split('"')[1].strip().upper()
-                commodities.add(name)
-
-    return commodities
+    return {
+        match.group(1).strip().upper()
+        for match in COMMODITY_LINE_RE.finditer(file_path.read_text())
+    }
 
 
 def load_existing_price_commodities(price_file):
@@ -88,6 +92,45 @@ def load_existing_price_commodities(price_file):
 
 _INSTRUMENT_CACHE = {}
 _MF_SCHEME_CODE_CACHE = {}
+_UPSTOX_RATE_LOCK = threading.Lock()
+_UPSTOX_NEXT_REQUEST_TIME = 0.0
+
+# one keep-alive connection pool shared by every fetch thread
+http_session = requests.Session()
+http_adapter = HTTPAdapter(
+    pool_connections=PRICE_FETCH_WORKERS,
+    pool_maxsize=PRICE_FETCH_WORKERS,
+    # a gateway hiccup or a rate limit reply is retried on the same pooled
+    # connection (honouring Retry-After) instead of dropping that commodity's
+    # prices for the year
+    # once retries run out the last response is returned rather than raised,
+    # so the caller reports that one commodity and the batch carries on
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        raise_on_status=False,
+    ),
+)
+# the NAV URL comes from config and may be plain http
+http_session.mount("https://", http_adapter)
+http_session.mount("http://", http_adapter)
+
+
+def wait_for_upstox_slot():
+    """
+    Block until the next Upstox request may be sent. Slots are handed out
+    UPSTOX_REQUEST_INTERVAL seconds apart, so concurrent fetches keep the
+    same request rate a sequential loop with a sleep would.
+    """
+    global _UPSTOX_NEXT_REQUEST_TIME
+
+    with _UPSTOX_RATE_LOCK:
+        now = time.monotonic()
+        slot = max(now, _UPSTOX_NEXT_REQUEST_TIME)
+        _UPSTOX_NEXT_REQUEST_TIME = slot + UPSTOX_REQUEST_INTERVAL
+
+    time.sleep(slot - now)
 
 
 def load_upstox_instruments():
@@ -98,36 +141,96 @@ def load_upstox_instruments():
     if _INSTRUMENT_CACHE:
         return _INSTRUMENT_CACHE
 
+    # the instrument master changes at most daily, reuse today's download and
+    # only revalidate an older one with the server
+    cache_file = CACHE_DIR / f"nse_instruments.{date.today():%Y%m%d}.pkl"
+    # YYYYMMDD names sort by date, newest first
+    cached_files = sorted(CACHE_DIR.glob("nse_instruments.*.pkl"), reverse=True)
+    cached = read_instrument_cache(cached_files[0]) if cached_files else None
+    if cached and cached_files[0] == cache_file:
+        _INSTRUMENT_CACHE.update(cached["instruments"])
+        print(f"Loaded NSE EQ instruments from {cache_file}")
+        return _INSTRUMENT_CACHE
+
     print("Loading Upstox instrument master...")
 
     url = "https://assets.upstox.com/market-quote/instruments/exchange/NSE.csv.gz"
     headers = {"User-Agent": "Mozilla/5.0"}
-
-    resp = requests.get(url, headers=headers, timeout=30)
-    resp.raise_for_status()
-
-    # The content is gzip-compressed JSON lines
-    import gzip
-
-    f = gzip.GzipFile(fileobj=io.BytesIO(resp.content))
-    text_io = io.TextIOWrapper(f, encoding="utf-8")
-
-    reader = csv.DictReader(text_io)
+    if cached and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached["last_modified"]:
+        headers["If-Modified-Since"] = cached["last_modified"]
 
     count = 0
-    for row in reader:
-        symbol = row.get("tradingsymbol")
-        instrument_key = row.get("instrument_key")
-
-        if symbol and instrument_key:
-            _INSTRUMENT_CACHE[symbol] = instrument_key
-            _INSTRUMENT_CACHE[instrument_key] = instrument_key
-            count += 1
+    with http_session.get(
+        url, headers=headers, timeout=HTTP_TIMEOUT, stream=True
+    ) as resp:
+        if cached and resp.status_code == 304:
+            _INSTRUMENT_CACHE.update(cached["instruments"])
+            print(f"NSE EQ instruments unchanged since {cached_files[0]}")
+            save_instrument_cache(cache_file, cached["etag"], cached["last_modified"])
+            return _INSTRUMENT_CACHE
+
+        resp.raise_for_status()
+        # undo any transport encoding the same way resp.content would
+        resp.raw.decode_content = True
+
+        # The content is a gzip-compressed CSV, inflate and parse it while it
+        # is still downloading instead of buffering the whole file first
+        f = gzip.GzipFile(fileobj=resp.raw)
+        text_io = io.TextIOWrapper(f, encoding="utf-8", newline="")
+
+        reader = csv.DictReader(text_io)
+
+        for row in reader:
+            symbol = row.get("tradingsymbol")
+            instrument_key = row.get("instrument_key")
+
+            if symbol and instrument_key:
+                _INSTRUMENT_CACHE[symbol] = instrument_key
+                _INSTRUMENT_CACHE[instrument_key] = instrument_key
+                count += 1
 
     print(f"Loaded {count} NSE EQ instruments")
+    save_instrument_cache(
+        cache_file, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    )
     return _INSTRUMENT_CACHE
 
 
+def read_instrument_cache(cache_file):
+    """
+    Instruments and the HTTP validators they were downloaded with, or None
+    if the cache file is unreadable.
+    """
+    try:
+        with open(cache_file, "rb") as f:
+            cached = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    if not isinstance(cached, dict) or "instruments" not in cached:
+        return None
+    return cached
+
+
+def save_instrument_cache(cache_file, etag, last_modified):
+    """Replace any older day's instrument cache with today's."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for stale_file in CACHE_DIR.glob("nse_instruments.*.pkl"):
+        stale_file.unlink(missing_ok=True)
+
+    cached = {
+        "etag": etag,
+        "last_modified": last_modified,
+        "instruments": _INSTRUMENT_CACHE,
+    }
+    tmp_file = cache_file.with_suffix(".tmp")
+    with open(tmp_file, "wb") as f:
+        pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_file.replace(cache_file)
+
+
 def get_instrument_key(symbol):
     """Get instrument key from cache"""
     load_upstox_instruments()
@@ -141,7 +244,7 @@ def get_instrument_key(symbol):
 def fetch_ind_price_history(symbol, year):
     """
     Fetch daily closing prices from Upstox (EOD candles).
-    Prices are always in INR.
+    Prices are always in INR, returned as (date, close) pairs oldest first.
     """
     if not UPSTOX_ACCESS_TOKEN:
         print("ERROR: UPSTOX_ACCESS_TOKEN not set")
@@ -163,96 +266,131 @@ def fetch_ind_price_history(symbol, year):
         f"{instrument_key}/days/1/{end}/{start}"
     )
 
-    resp = requests.get(url, headers=headers)
+    wait_for_upstox_slot()
+    try:
+        resp = http_session.get(url, headers=headers, timeout=HTTP_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"ERROR: {symbol} - {e}")
+        return []
 
     if resp.status_code != 200:
         print(f"ERROR: {symbol} - Status {resp.status_code}: {resp.text}")
-        return {}
+        return []
 
     data = resp.json()
 
     if "data" not in data or "candles" not in data["data"]:
         print(f"WARNING: No candle data for {symbol}")
-        return {}
+        return []
 
-    prices = {}
+    # Upstox sends candles newest first
+    prices = []
     for candle in data["data"]["candles"]:
         date_str = candle[0][:10]
         close_price = float(candle[4])
-        prices[date_str] = close_price
+        prices.append((date_str, close_price))
 
+    prices.reverse()
     return prices
 
 
-def fetch_us_price_history(symbol, year):
+def fetch_us_price_histories(commodities, year):
     """
-    Fetch daily closing prices from yfinance.
+    Fetch daily closing prices for all US commodities with one yfinance
+    download, yielding (commodity, prices) in the order the commodities were
+    given. Prices are (date, close) pairs, oldest first.
     """
-    if symbol.upper() in CRYPTO_LIST:
-        symbol = f"{symbol.upper()}-USD"
+    if not commodities:
+        return
 
-    start_date = f"{year}-01-01"
-    end_date = f"{year + 1}-01-01"
+    tickers = [
+        f"{c.upper()}-USD" if c.upper() in CRYPTO_LIST else c for c in commodities
+    ]
+
+    print(f"Fetching US commodities {', '.join(commodities)} for {year}")
+    data = yf.download(
+        tickers,
+        start=f"{year}-01-01",
+        end=f"{year + 1}-01-01",
+        group_by="ticker",
+        # (ticker, field) columns even when a single ticker is requested
+        multi_level_index=True,
+        auto_adjust=True,
+        progress=False,
+    )
 
-    ticker = yf.Ticker(symbol)
-    data = ticker.history(start=start_date, end=end_date)
+    downloaded = set(data.columns.get_level_values(0)) if not data.empty else set()
+    for commodity, ticker in zip(commodities, tickers):
+        if ticker not in downloaded:
+            yield commodity, []
+            continue
 
-    return {
-        idx.strftime("%Y-%m-%d"): float(row["Close"]) for idx, row in data.iterrows()
-    }
+        # crypto trades every day, other tickers have gaps on those dates
+        close = data[ticker]["Close"].dropna()
+        yield commodity, list(zip(close.index.strftime("%Y-%m-%d"), close.tolist()))
 
 
 _MF_NAV_CACHE: Dict[str, Dict] = None
 
 
-def fetch_ind_mf_price_history(isin: str, year: int) -> Dict[str, float]:
+@lru_cache(maxsize=None)
+def parse_nav_date(nav_date_str):
+    """
+    NAV dates repeat across almost every scheme, parse each one once.
+    Returns the datetime and its YYYY-MM-DD form.
+    """
+    dt = datetime.strptime(nav_date_str, "%d-%b-%Y")
+    return dt, dt.strftime("%Y-%m-%d")
+
+
+def fetch_ind_mf_price_history(isin: str, year: int) -> List[Tuple[str, float]]:
+    """Latest NAV of the fund as a single (date, nav) pair, if it falls in year."""
     global _MF_NAV_CACHE
 
     if _MF_NAV_CACHE is None:
         _MF_NAV_CACHE = {}
+        dashboard_config = load_yaml_config(DASHBOARD_CONFIG_PATH)
         url = dashboard_config["dashboard"]["base_urls"]["mf_india_nav_all"]
 
         try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            text = response.text.strip()
-
-            for line in text.splitlines():
-                line = line.strip()
-                if not line or ";" not in line or line.startswith("Scheme Code"):
-                    continue
-
-                parts = [p.strip() for p in line.split(";")]
-                if len(parts) < 6:
-                    continue
-
-                isin1 = parts[1] if len(parts) > 1 and parts[1] != "-" else ""
-                isin2 = parts[2] if len(parts) > 2 and parts[2] != "-" else ""
-                scheme_name = parts[3] if len(parts) > 3 else ""
-                nav_str = parts[4] if len(parts) > 4 else "0"
-                nav_date_str = parts[5] if len(parts) > 5 else ""
-
-                try:
-                    nav = float(nav_str)
-                    dt = datetime.strptime(nav_date_str, "%d-%b-%Y")
-
-                    # Changed to proper YYYY-MM-DD format
-                    date_key = dt.strftime("%Y-%m-%d")
-
-                    data = {
-                        "nav": nav,
-                        "date": date_key,
-                        "date_obj": dt,
-                        "scheme_name": scheme_name,
-                    }
-
-                    if isin1:
-                        _MF_NAV_CACHE[isin1.upper()] = data
-                    if isin2 and isin2 != isin1:
-                        _MF_NAV_CACHE[isin2.upper()] = data
-
-                except (ValueError, TypeError):
-                    continue
+            # parse the NAV file while it downloads instead of holding the text
+            with http_session.get(url, timeout=HTTP_TIMEOUT, stream=True) as response:
+                response.raise_for_status()
+                response.encoding = response.encoding or "utf-8"
+
+                for line in response.iter_lines(decode_unicode=True):
+                    line = line.strip()
+                    if not line or ";" not in line or line.startswith("Scheme Code"):
+                        continue
+
+                    parts = [p.strip() for p in line.split(";")]
+                    if len(parts) < 6:
+                        continue
+
+                    isin1 = parts[1] if len(parts) > 1 and parts[1] != "-" else ""
+                    isin2 = parts[2] if len(parts) > 2 and parts[2] != "-" else ""
+                    scheme_name = parts[3] if len(parts) > 3 else ""
+                    nav_str = parts[4] if len(parts) > 4 else "0"
+                    nav_date_str = parts[5] if len(parts) > 5 else ""
+
+                    try:
+                        nav = float(nav_str)
+                        dt, date_key = parse_nav_date(nav_date_str)
+
+                        data = {
+                            "nav": nav,
+                            "date": date_key,
+                            "date_obj": dt,
+                            "scheme_name": scheme_name,
+                        }
+
+                        if isin1:
+                            _MF_NAV_CACHE[isin1.upper()] = data
+                        if isin2 and isin2 != isin1:
+                            _MF_NAV_CACHE[isin2.upper()] = data
+
+                    except (ValueError, TypeError):
+                        continue
 
             print(f"NAV cache built successfully with {len(_MF_NAV_CACHE)} schemes")
 
@@ -263,7 +401,7 @@ def fetch_ind_mf_price_history(isin: str, year: int) -> Dict[str, float]:
     isin_upper = isin.upper()
     if isin_upper not in _MF_NAV_CACHE:
         print(f"WARNING: ISIN {isin} not found in latest NAV")
-        return {}
+        return []
 
     cached = _MF_NAV_CACHE[isin_upper]
 
@@ -271,9 +409,25 @@ def fetch_ind_mf_price_history(isin: str, year: int) -> Dict[str, float]:
         print(
             f"WARNING: Latest NAV for {isin} is on {cached['date']} (not in year {year})"
         )
-        return {}
+        return []
+
+    return [(cached["date"], cached["nav"])]
+
+
+def fetch_price_histories(fetch, commodities, year, label):
+    """
+    Fetch one year of prices for every commodity concurrently, yielding
+    (commodity, prices) in the order the commodities were given.
+    """
+
+    def fetch_one(commodity):
+        print(f"Fetching {label} {commodity} for {year}")
+        return commodity, fetch(commodity, year)
 
-    return {cached["date"]: cached["nav"]}
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=PRICE_FETCH_WORKERS
+    ) as executor:
+        yield from executor.map(fetch_one, commodities)
 
 
 def write_prices_for_year(year, us_commodities, ind_commodities, ind_mf_commodities):
@@ -282,6 +436,7 @@ def write_prices_for_year(year, us_commodities, ind_commodities, ind_mf_commodit
     """
     output_file = LEDGER_PRICE_DB_DIR / f"{year}.db"
     new_lines = []
+    lines_written = 0
 
     # Load existing commodities ONCE (performance fix)
     existing_commodities = load_existing_price_commodities(output_file)
@@ -295,31 +450,48 @@ def write_prices_for_year(year, us_commodities, ind_commodities, ind_mf_commodit
             new_lines.append(f"{prefix} {rate:.4f} {currency}")
             existing_prefixes.add(prefix)
 
-    # ---------- US COMMODITIES ----------
-    for commodity in us_commodities:
-        if commodity in existing_commodities:
-            # print(f"Skipping {commodity} (already present)")
-            continue
+    def flush_price_lines():
+        """
+        Append the lines gathered so far to the price file. Called after each
+        commodity, so prices fetched before a failure are kept and that
+        commodity is skipped on the next run.
+        """
+        nonlocal lines_written
+        if not new_lines:
+            return
 
-        print(f"Fetching US commodity {commodity} for {year}")
-        prices = fetch_us_price_history(commodity, year)
+        new_lines.sort(key=lambda line: (line.split('"')[1], line.split()[1]))
+        write_header = not output_file.exists() or output_file.stat().st_size == 0
 
-        for d, rate in sorted(prices.items()):
-            add_price_line(d, commodity, float(rate), "USD")
+        with open(output_file, "a") as f:
+            if write_header:
+                f.write(";\n")
+                f.write(f"; Auto-generated prices for {year}\n")
+                f.write(";\n")
 
-    # ---------- INDIAN COMMODITIES ----------
-    for commodity in ind_commodities:
-        if commodity in existing_commodities:
-            # print(f"Skipping {commodity} (already present)")
-            continue
+            f.writelines(f"{line}\n" for line in new_lines)
 
-        print(f"Fetching Indian commodity {commodity} for {year}")
-        prices = fetch_ind_price_history(commodity, year)
+        lines_written += len(new_lines)
+        new_lines.clear()
 
-        time.sleep(3)
+    # ---------- US COMMODITIES ----------
+    pending_us = [c for c in us_commodities if c not in existing_commodities]
+    for commodity, prices in fetch_us_price_histories(pending_us, year):
+        for d, rate in prices:
+            add_price_line(d, commodity, float(rate), "USD")
+        flush_price_lines()
 
-        for d, rate in sorted(prices.items()):
+    # ---------- INDIAN COMMODITIES ----------
+    pending_ind = [c for c in ind_commodities if c not in existing_commodities]
+    if pending_ind:
+        # fill the instrument cache before the threads read it
+        load_upstox_instruments()
+    for commodity, prices in fetch_price_histories(
+        fetch_ind_price_history, pending_ind, year, "Indian commodity"
+    ):
+        for d, rate in prices:
             add_price_line(d, commodity, float(rate), "INR")
+        flush_price_lines()
 
     # ---------- INDIAN MUTUAL FUNDS ----------
     for commodity in ind_mf_commodities:
@@ -330,10 +502,12 @@ def write_prices_for_year(year, us_commodities, ind_commodities, ind_mf_commodit
         print(f"Fetching Indian MF {commodity} for {year}")
         prices = fetch_ind_mf_price_history(commodity, year)
 
-        for d, rate in sorted(prices.items()):
+        for d, rate in prices:
             add_price_line(d, commodity, float(rate), "INR")
+        flush_price_lines()
 
     # ---------- Update file from nse live data for GSec  ----------
+    nse_gsec_files = get_nse_gsec_files()
     if not nse_gsec_files.empty:
         df = nse_gsec_files.copy()
 
@@ -355,23 +529,12 @@ def write_prices_for_year(year, us_commodities, ind_commodities, ind_mf_commodit
                 rate = float(str(ltp).replace(",", ""))
 
             add_price_line(d, row.SYMBOL, rate, "INR")
+        flush_price_lines()
 
-    if not new_lines:
+    if not lines_written:
         print("No new prices to write.")
         return
 
-    new_lines.sort(key=lambda line: (line.split('"')[1], line.split()[1]))
-    write_header = not output_file.exists() or output_file.stat().st_size == 0
-
-    with open(output_file, "a") as f:
-        if write_header:
-            f.write(";\n")
-            f.write(f"; Auto-generated prices for {year}\n")
-            f.write(";\n")
-
-        f.write("\n".join(new_lines))
-        f.write("\n")
-
     print(f"Updated {output_file}")
 
 
@@ -1,8 +1,7 @@
 import csv
 import sys
 from datetime import date
-
-import yaml
+from operator import itemgetter
 
 from src.data.config import (
     ADDITIONAL_STATEMENTS_DIR,
@@ -10,11 +9,11 @@ from src.data.config import (
     SCRIP_CODE_TO_TICKER_LOOKUP,
 )
 from src.service.portfolio.transaction.statement_rule_engine import create_transaction
+from src.service.util.config_loader import load_yaml_config
 from src.service.util.csv_util import non_comment_lines, normalized_dict_reader
 from src.service.util.date_util import parse_indian_date_format
 
-with open(DASHBOARD_CONFIG_PATH, "r") as f:
-    dashboard_config = yaml.safe_load(f)
+dashboard_config = load_yaml_config(DASHBOARD_CONFIG_PATH)
 mutual_funds_gr_config = dashboard_config["dashboard"]["mutual_funds_gr"]
 
 
@@ -520,11 +519,17 @@ def ingest_is_statements(statement_type, filename, who):
     new_transactions = []
     for file in ADDITIONAL_STATEMENTS_DIR.glob(f"{filename}.csv"):
         with file.open(encoding="utf-8") as f:
-            reader = normalized_dict_reader(non_comment_lines(f), delimiter="\t")
+            # plain rows indexed by header position, no dict built per row
+            reader = csv.reader(non_comment_lines(f), delimiter="\t")
+            header = [h.strip() for h in next(reader)]
+            deposit_col = header.index("Deposit Amount(INR)")
+            withdrawal_col = header.index("Withdrawal Amount(INR)")
+            remarks_col = header.index("Transaction Remarks")
+            date_col = header.index("Transaction Date")
 
             for row in reader:
-                deposit = float(row.get("Deposit Amount(INR)"))
-                withdrawal = float(row.get("Withdrawal Amount(INR)"))
+                deposit = float(row[deposit_col])
+                withdrawal = float(row[withdrawal_col])
 
                 net_amount = deposit - withdrawal
                 abs_amount = abs(net_amount)
@@ -532,8 +537,8 @@ def ingest_is_statements(statement_type, filename, who):
                 from_value = f"{str(-abs_amount)} INR"
                 to_value = f"{str(abs_amount)} INR"
 
-                remark = row.get("Transaction Remarks", "").strip()
-                date = parse_indian_date_format(row["Transaction Date"])
+                remark = row[remarks_col].strip()
+                date = parse_indian_date_format(row[date_col])
 
                 transaction = create_transaction(
                     statement_type, who, date, remark, from_value, to_value, net_amount
@@ -611,13 +616,15 @@ def ingest_statements(statement_type, filename, who, print_after_date):
             statement_type=statement_type, filename=filename, who=who
         )
 
-    writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames)
-    writer.writeheader()
+    writer = csv.writer(sys.stdout)
+    writer.writerow(fieldnames)
+    # create_transaction fills exactly these keys, read them positionally
+    row_values = itemgetter(*fieldnames)
     for tx in transactions:
         tx_date = tx["DATE(YYYY-MM-DD)"]
         if tx_date > print_after_date:
             tx["DATE(YYYY-MM-DD)"] = tx_date.strftime("%Y-%m-%d")
-            writer.writerow(tx)
+            writer.writerow(row_values(tx))
 
 
 if __name__ == "__main__":
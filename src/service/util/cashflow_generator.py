@@ -1,4 +1,5 @@
 from datetime import date, timedelta
+from functools import lru_cache
 from typing import List, Tuple
 
 from dateutil.relativedelta import relativedelta
@@ -13,10 +14,11 @@ def market_shifted(dt: date):
     return next_market_day(dt, lag_days=0)
 
 
+@lru_cache(maxsize=512)
 def generate_coupon_dates(start_date, maturity_date, coupon_frequency):
     """
     Generate market-shifted coupon dates after start_date
-    and before maturity_date
+    and before maturity_date, as a tuple so the cached result can't be mutated
     """
     months_per_coupon = 12 // coupon_frequency
 
@@ -35,7 +37,7 @@ def generate_coupon_dates(start_date, maturity_date, coupon_frequency):
         coupon_dates.append(market_shifted(coupon_date))
         coupon_date += relativedelta(months=months_per_coupon)
 
-    return coupon_dates
+    return tuple(coupon_dates)
 
 
 def apply_coupon_and_principal(cf, coupon_rate, coupon_frequency, face_value):
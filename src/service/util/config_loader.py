@@ -0,0 +1,25 @@
+import os
+from functools import lru_cache
+
+import yaml
+
+# libyaml backed loader when available, pure python otherwise
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml_config(path):
+    """
+    Parse a YAML config file once per process, or again after it changes.
+
+    Every module that needs the dashboard config shares the same parsed
+    object, so callers must treat the returned dict as read-only.
+    """
+    stat = os.stat(path)
+    return parse_yaml_config(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=32)
+def parse_yaml_config(path, mtime_ns, size):
+    """Cached parse, mtime and size only make an edited file a new key."""
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=SafeLoader)
@@ -1,8 +1,11 @@
 from datetime import date, datetime
+from functools import lru_cache
 
 import pandas as pd
 
 
+# typed so a Timestamp never gets the cached result of an equal datetime
+@lru_cache(maxsize=4096, typed=True)
 def parse_indian_date_format(val):
     """
     Normalize any date-like input to datetime.date.
@@ -1,4 +1,5 @@
 from datetime import date, timedelta
+from functools import lru_cache
 
 import holidays
 
@@ -10,6 +11,7 @@ india_holidays = set(
 market_holidays = india_holidays
 
 
+@lru_cache(maxsize=4096)
 def next_market_day(start_date: date, lag_days: int = 1) -> date:
     """
     Returns the date after lag_days, skipping weekends and holidays.
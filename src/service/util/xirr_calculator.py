@@ -18,7 +18,30 @@ def xirr(dates, cashflows, guess=0.1):
             f"Cannot calculate XIRR: all cashflows have the same sign. Cashflows: {cashflows}"
         )
 
-    days = np.array([(d - dates[0]).days for d in dates], dtype=float)
+    if len(dates) != len(cashflows):
+        raise ValueError(
+            f"Cannot calculate XIRR: {len(dates)} dates for {len(cashflows)} cashflows"
+        )
+
+    # Exactly two non-zero cashflows have a closed form, skip Newton-Raphson
+    # (1 + rate) ** years = -later / earlier
+    non_zero = [(d, c) for d, c in zip(dates, cashflows) if c != 0]
+    if len(non_zero) == 2:
+        (first_date, first_cf), (last_date, last_cf) = non_zero
+        years = (last_date - first_date).days / 365.0
+        if years:
+            try:
+                return (-last_cf / first_cf) ** (1 / years) - 1
+            except OverflowError:
+                # a large gain over a few days has no float rate, leave it
+                # to the iterative path below as before
+                pass
+
+    # Zero cashflows add nothing to the NPV, only discount the non-zero ones.
+    # Days stay relative to the first date so the rate found is unchanged
+    start = dates[0].toordinal()
+    days = np.array([d.toordinal() - start for d, _ in non_zero], dtype=float)
+    cashflows = np.array([c for _, c in non_zero], dtype=float)
 
     # Define Net Present Value (NPV) function at a given rate
     # This calculates the present value of all cashflows discounted at rate
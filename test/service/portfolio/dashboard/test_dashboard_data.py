@@ -1,13 +1,17 @@
 import json
 from unittest.mock import patch
 
+import pytest
 import yaml
 
 from src.data.config import DASHBOARD_CONFIG_PATH
 from src.service.portfolio.dashboard.dashboard_data import (
+    build_prefix_trie,
     calculate_category_tables_data,
     calculate_investment_allocation,
     calculate_summary_data,
+    match_prefix,
+    zero_balance_totals,
 )
 from src.service.util.df_util import assert_dataframes_equal, json_to_df
 
@@ -90,3 +94,42 @@ def test_calculate_investment_allocation():
     result_df = json_to_df(result)
     expected_df = json_to_df(dashboard_expected_output["investment_allocation_data"])
     assert_dataframes_equal(result_df, expected_df)
+
+
+@pytest.mark.parametrize(
+    "account, expected",
+    [
+        ("Assets:Investments:Equity:INFY", "Equity"),
+        ("Assets:Investments:GSec:GS2033", "Bonds"),
+        ("Assets:Investments:GSec", "Bonds"),
+        ("Assets:Investments:MutualFunds:X", "Investments"),
+        ("Assets:Bank:SBI", None),
+        ("Assets:InvestmentsX", None),
+    ],
+)
+def test_match_prefix(account, expected):
+    trie = build_prefix_trie(
+        {
+            "Investments": "Assets:Investments",
+            "Equity": "Assets:Investments:Equity",
+            "Bonds": "Assets:Investments:GSec:",
+        }
+    )
+    assert match_prefix(trie, account) == expected
+
+
+def test_zero_balance_totals():
+    balance_sheet = [
+        {"account": "Assets:Clearing", "amount": 10.0},
+        {"account": "Assets:Clearing:Broker", "amount": 10.0},
+        {"account": "Assets:ClearingHouse", "amount": 5.0},
+        {"account": "Assets:Bank", "amount": 100.0},
+    ]
+    result = zero_balance_totals(
+        balance_sheet, ["Assets:Clearing:Broker", "Assets:Clearing", "Assets:Loan"]
+    )
+    assert result == {
+        "Assets:Clearing:Broker": 10.0,
+        "Assets:Clearing": 25.0,
+        "Assets:Loan": 0,
+    }
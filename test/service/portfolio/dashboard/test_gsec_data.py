@@ -6,6 +6,9 @@ from freezegun import freeze_time
 
 from src.service.portfolio.dashboard.gsec_data import (
     calculate_gsec_individual_xirr_report_data,
+    generate_gsec_portfolio_df,
+    get_process_pool,
+    shutdown_process_pool,
 )
 from src.service.util.df_util import assert_dataframes_equal, json_to_df
 
@@ -39,11 +42,13 @@ def test_calculate_gsec_individual_xirr_report_data():
         if command_type.lower() == "commodities":
             if cmd == "list gsec":
                 return ledger_data["gsec_list"]
+        elif command_type.lower() == "gsec_register_by_commodity":
+            return {
+                symbol: register["purchase_or_sell"]
+                for symbol, register in ledger_data["gsec_register"].items()
+            }
         elif command_type.lower() == "gsec_register":
-            if cmd == "gsec register":
-                return ledger_data["gsec_register"][commodity]["purchase_or_sell"]
-            else:
-                return ledger_data["gsec_validate"]
+            return ledger_data["gsec_validate"]
 
     with patch(
         "src.service.portfolio.dashboard.gsec_data.get_ledger_cli_output_by_config",
@@ -65,3 +70,55 @@ def test_calculate_gsec_individual_xirr_report_data():
         assert_dataframes_equal(result_cashflow_df, expected_cashflow_df)
         assert_dataframes_equal(result_kpi_list_df, expected_kpi_list_df)
         assert_dataframes_equal(result_xirr_data_df, expected_xirr_data_df)
+
+
+def test_generate_gsec_portfolio_df_skips_commodity_without_register_rows(capsys):
+    def mock_get_ledger_cli_output_by_config(
+        config, ledger_files, commodity=None, command_type="balance"
+    ):
+        if command_type == "commodities":
+            return ["717GS2033", "736GS2052"]
+        return {"717GS2033": [{"date": "2026-03-18", "quantity": 100.0, "amount": 1.0}]}
+
+    with patch(
+        "src.service.portfolio.dashboard.gsec_data.get_ledger_cli_output_by_config",
+        side_effect=mock_get_ledger_cli_output_by_config,
+    ), patch(
+        "src.service.portfolio.dashboard.gsec_data.compute_for_commodity",
+        side_effect=lambda commodity, register_data: (commodity, register_data),
+    ):
+        result = generate_gsec_portfolio_df(
+            {"dummy_ledger_file.ledger"},
+            {"list_commodity": {}, "register": {}},
+        )
+
+    assert result == [
+        (
+            "717GS2033",
+            [{"date": "2026-03-18", "quantity": 100.0, "amount": 1.0}],
+        )
+    ]
+    assert "736GS2052" in capsys.readouterr().out
+
+
+def test_get_process_pool_sized_by_commodities():
+    with patch(
+        "src.service.portfolio.dashboard.gsec_data.os.cpu_count", return_value=8
+    ), patch(
+        "src.service.portfolio.dashboard.gsec_data.concurrent.futures.ProcessPoolExecutor"
+    ) as pool_class:
+        try:
+            # no more workers than commodities
+            pool = get_process_pool(5)
+            pool_class.assert_called_once_with(5)
+
+            # a smaller report reuses the pool
+            assert get_process_pool(4) is pool
+            assert pool_class.call_count == 1
+
+            # a larger one replaces it, capped at the cpu count
+            get_process_pool(20)
+            pool.shutdown.assert_called_once()
+            pool_class.assert_called_with(8)
+        finally:
+            shutdown_process_pool()
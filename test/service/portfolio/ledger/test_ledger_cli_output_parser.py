@@ -3,11 +3,15 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from src.service.portfolio.ledger.ledger_cli_output_parser import (
+    find_parent_accounts,
     get_ledger_cli_output_by_config,
+    ledger_file_flags,
     parse_ledger_cli_balance_output,
     parse_ledger_cli_commodities_output,
+    parse_ledger_cli_gsec_register_by_commodity_output,
     parse_ledger_cli_gsec_register_output,
     parse_ledger_cli_register_output,
+    resolve_executable,
     run_ledger_cli_command,
 )
 
@@ -59,27 +63,80 @@ def test_get_ledger_cli_output_by_config(command_type, cli_output, expected):
         mock_run.assert_called_once()
 
 
+def mock_popen(stdout_lines, returncode, stderr_text):
+    def popen(cmd, stderr, **kwargs):
+        stderr.write(stderr_text)
+        process = MagicMock(stdout=iter(stdout_lines))
+        process.__enter__.return_value = process
+        process.wait.return_value = returncode
+        return process
+
+    return MagicMock(side_effect=popen)
+
+
 @pytest.mark.parametrize(
     "mock_returncode, mock_stdout, mock_stderr, expected",
     [
-        (0, "ok", "", "ok"),
-        (1, "", "error", RuntimeError),
+        (0, ["ok\n"], "", ["ok\n"]),
+        (0, ["a\n", "b\n"], "", ["a\n", "b\n"]),
+        (1, [], "error", RuntimeError),
     ],
 )
-@patch("subprocess.run")
-def test_run_ledger_cli_command(
-    mock_run, mock_returncode, mock_stdout, mock_stderr, expected
-):
-    mock_run.return_value = MagicMock(
-        returncode=mock_returncode,
-        stdout=mock_stdout,
-        stderr=mock_stderr,
-    )
-    if expected == RuntimeError:
-        with pytest.raises(RuntimeError):
-            run_ledger_cli_command(["ledger"])
-    else:
-        assert run_ledger_cli_command(["ledger"]) == expected
+def test_run_ledger_cli_command(mock_returncode, mock_stdout, mock_stderr, expected):
+    with patch(
+        "subprocess.Popen", mock_popen(mock_stdout, mock_returncode, mock_stderr)
+    ):
+        if expected == RuntimeError:
+            with pytest.raises(RuntimeError, match=mock_stderr):
+                list(run_ledger_cli_command(["ledger"]))
+        else:
+            assert list(run_ledger_cli_command(["ledger"])) == expected
+
+
+@patch("shutil.which", return_value="/usr/bin/ledger")
+def test_run_ledger_cli_command_spawn_args(mock_which):
+    resolve_executable.cache_clear()
+    with patch("subprocess.Popen", mock_popen(["ok\n"], 0, "")) as mock_run:
+        list(run_ledger_cli_command(["ledger", "balance"]))
+
+    args, kwargs = mock_run.call_args
+    assert args[0] == ["/usr/bin/ledger", "balance"]
+    assert kwargs["close_fds"] is False
+    resolve_executable.cache_clear()
+
+
+def test_parse_balance_from_line_stream():
+    lines = iter(["  1000 INR  Assets\n", "   500 INR    Bank\n", "----\n"])
+    assert parse_ledger_cli_balance_output(lines) == [
+        {"currency": "INR", "amount": 1000.0, "account": "Assets", "level": 0},
+        {"currency": "INR", "amount": 500.0, "account": "Assets:Bank", "level": 1},
+    ]
+
+
+@pytest.mark.parametrize(
+    "ledger_files, expected",
+    [
+        ((), ()),
+        (("a.ledger",), ("-f", "a.ledger")),
+        (("a.ledger", "b.ledger"), ("-f", "a.ledger", "-f", "b.ledger")),
+    ],
+)
+def test_ledger_file_flags(ledger_files, expected):
+    assert ledger_file_flags(ledger_files) == expected
+
+
+@pytest.mark.parametrize(
+    "accounts, expected",
+    [
+        ([], set()),
+        (["Assets", "Assets:Bank", "Assets:Bank:HDFC"], {"Assets", "Assets:Bank"}),
+        # sibling sorting between a parent and its children
+        (["Assets:Bank", "Assets:Bank 2", "Assets:Bank:HDFC"], {"Assets:Bank"}),
+        (["Assets:Bank", "Assets:Bank", "Assets:BankX"], set()),
+    ],
+)
+def test_find_parent_accounts(accounts, expected):
+    assert find_parent_accounts(accounts) == expected
 
 
 @pytest.mark.parametrize(
@@ -154,6 +211,52 @@ def test_parse_register(input_data, expected):
                 },
             ],
         ),
+        # Nested accounts, negative and comma separated amounts, total line
+        (
+            """
+               12,500.00 INR  Assets
+               10,000.00 INR    Bank
+                7,500.00 INR      HDFC
+                2,500.00 INR      SBI
+                2,500.00 INR    Investments
+               -1,000.50 INR  Liabilities:Credit Card
+            --------------------
+               11,499.50 INR
+            """,
+            [
+                {"currency": "INR", "amount": 12500.0, "account": "Assets", "level": 0},
+                {
+                    "currency": "INR",
+                    "amount": 10000.0,
+                    "account": "Assets:Bank",
+                    "level": 1,
+                },
+                {
+                    "currency": "INR",
+                    "amount": 7500.0,
+                    "account": "Assets:Bank:HDFC",
+                    "level": 2,
+                },
+                {
+                    "currency": "INR",
+                    "amount": 2500.0,
+                    "account": "Assets:Bank:SBI",
+                    "level": 2,
+                },
+                {
+                    "currency": "INR",
+                    "amount": 2500.0,
+                    "account": "Assets:Investments",
+                    "level": 1,
+                },
+                {
+                    "currency": "INR",
+                    "amount": -1000.5,
+                    "account": "Liabilities:Credit Card",
+                    "level": 0,
+                },
+            ],
+        ),
     ],
 )
 def test_parse_balance(input_data, expected_output):
@@ -191,3 +294,35 @@ def test_parse_balance(input_data, expected_output):
 def test_parse_gsec_register(input_data, expected_output):
     output = parse_ledger_cli_gsec_register_output(input_data)
     assert output == expected_output
+
+
+def test_parse_gsec_register_by_commodity():
+    input_data = """2026-03-18 | Assets:GSec | 1,000 XYZ | 10,500.50 INR
+                    2026-03-19 | Assets:GSec | 500 "717GS2033" | 5,250.00 INR
+                    2026-03-20 | Assets:GSec | -200 XYZ | -2,100.00 INR"""
+    expected_output = {
+        "XYZ": [
+            {"date": "2026-03-18", "quantity": 1000.0, "amount": 10500.50},
+            {"date": "2026-03-20", "quantity": -200.0, "amount": -2100.0},
+        ],
+        "717GS2033": [{"date": "2026-03-19", "quantity": 500.0, "amount": 5250.0}],
+    }
+    output = parse_ledger_cli_gsec_register_by_commodity_output(input_data)
+    assert output == expected_output
+
+
+@pytest.mark.parametrize(
+    "quantity_column, expected_key",
+    [
+        ("100 XYZ", "XYZ"),
+        ('100 "717GS2033"', "717GS2033"),
+        ('100 "GS 2033"', "GS 2033"),
+        ("1,000 XYZ ", "XYZ"),
+        # no commodity after the quantity, the row cannot be attributed
+        ("100", ""),
+    ],
+)
+def test_parse_gsec_register_by_commodity_key(quantity_column, expected_key):
+    input_data = f"2026-03-18 | Assets:GSec | {quantity_column} | 1,000.00 INR"
+    output = parse_ledger_cli_gsec_register_by_commodity_output(input_data)
+    assert list(output) == [expected_key]
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+import pytest
+
+from src.service.portfolio.ledger.ledger_entry_generator import (
+    csv_to_ledger_year_range,
+    parse_amount,
+)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("-4900.4 USD", (Decimal("-4900.4"), "USD")),
+        ("40 ACLS", (Decimal("40"), "ACLS")),
+        (
+            '1 "AAPL 2023-10-23 Call 195.00"',
+            (Decimal("1"), "AAPL 2023-10-23 Call 195.00"),
+        ),
+        # Surrounding and repeated whitespace
+        ("  5   EUR ", (Decimal("5"), "EUR")),
+        # Whitespace other than a plain space between amount and unit
+        ("10\tUSD", (Decimal("10"), "USD")),
+        ("10\tUSD X", (Decimal("10"), "USD X")),
+        ("10 \tUSD", (Decimal("10"), "USD")),
+        # Missing unit
+        ("10", "ValueError"),
+        ("10 ", "ValueError"),
+    ],
+)
+def test_parse_amount(value, expected):
+    if expected == "ValueError":
+        with pytest.raises(ValueError, match="Missing unit"):
+            parse_amount(value)
+    else:
+        assert parse_amount(value) == expected
+
+
+def test_csv_to_ledger_year_range_keeps_quotes_and_skips_comments(tmp_path):
+    transaction_dir = tmp_path / "transactions"
+    ledger_dir = tmp_path / "ledger"
+    transaction_dir.mkdir()
+    ledger_dir.mkdir()
+    (transaction_dir / "2024.csv").write_text(
+        "date,description,from_account,from_value,to_account,to_value,"
+        "adjustment_account,adjustment_value,lot_selection_method\n"
+        '# comment with an open quote x,"y\n'
+        '2024-01-02,"Dividend AAPL",Income:Dividend,-10 USD,Assets:Bank,10 USD,,,\n'
+        "\n"
+        "  # indented comment\n"
+        "2024-01-01,Buy AAPL,Assets:Bank,-100 USD,"
+        "Assets:Investments:Equity:Broker,2 AAPL,,,FIFO\n",
+        encoding="utf-8",
+    )
+
+    csv_to_ledger_year_range(str(transaction_dir), str(ledger_dir), 2024, 2024)
+
+    assert (ledger_dir / "2024.ledger").read_text(encoding="utf-8") == "\n".join(
+        [
+            "2024-01-01 Buy AAPL",
+            f"    {'Assets:Bank'.ljust(55)}-100.000000 USD",
+            f"    {'Assets:Investments:Equity:Broker'.ljust(55)}"
+            '2 "AAPL" @ 50.000000 USD',
+            "",
+            '2024-01-02 "Dividend AAPL"',
+            f"    {'Income:Dividend'.ljust(55)}-10 USD",
+            f"    {'Assets:Bank'.ljust(55)}10 USD",
+        ]
+    )
+
+
+def test_csv_to_ledger_year_range_rejects_malformed_row(tmp_path):
+    (tmp_path / "2024.csv").write_text(
+        "header\n2024-01-01,only,three\n", encoding="utf-8"
+    )
+
+    with pytest.raises(RuntimeError, match="Malformed row: 2024-01-01,only,three"):
+        csv_to_ledger_year_range(str(tmp_path), str(tmp_path), 2024, 2024)
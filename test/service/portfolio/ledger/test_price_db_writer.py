@@ -0,0 +1,195 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.service.portfolio.ledger import price_db_writer
+from src.service.portfolio.ledger.price_db_writer import (
+    fetch_ind_price_history,
+    fetch_price_histories,
+    fetch_us_price_histories,
+    http_session,
+    read_commodity_file,
+)
+
+
+def serve_status(status):
+    """Local server answering every request with the given status."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            body = b'{"status": "error"}'
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, requests_seen
+
+
+@pytest.fixture
+def upstox_at_status(request):
+    server, requests_seen = serve_status(request.param)
+    local_url = f"http://127.0.0.1:{server.server_port}/candles"
+    real_get = http_session.get
+
+    with patch.object(price_db_writer, "UPSTOX_ACCESS_TOKEN", "token"), patch.object(
+        price_db_writer, "get_instrument_key", return_value="NSE_EQ|1"
+    ), patch.object(price_db_writer, "wait_for_upstox_slot"), patch.object(
+        # keep the retry backoff out of the test run time
+        price_db_writer.http_adapter.max_retries,
+        "backoff_factor",
+        0,
+    ), patch.object(
+        http_session,
+        "get",
+        side_effect=lambda url, **kwargs: real_get(local_url, **kwargs),
+    ):
+        yield requests_seen
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("upstox_at_status", [503, 429], indirect=True)
+def test_fetch_ind_price_history_gives_up_on_persistent_error(upstox_at_status):
+    assert fetch_ind_price_history("INFY", 2026) == []
+    # first attempt plus the three retries
+    assert len(upstox_at_status) == 4
+
+
+@pytest.mark.parametrize("upstox_at_status", [503, 429], indirect=True)
+def test_fetch_price_histories_keeps_going_after_persistent_error(upstox_at_status):
+    result = list(
+        fetch_price_histories(
+            fetch_ind_price_history, ["INFY", "TCS"], 2026, "Indian commodity"
+        )
+    )
+
+    assert result == [("INFY", []), ("TCS", [])]
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        # Quoted commodities, names are stripped and uppercased
+        ('commodity "AAPL"', {"AAPL"}),
+        ('    commodity "infy"', {"INFY"}),
+        ('commodity " TCS "', {"TCS"}),
+        ('commodity "INFY" ; Equity', {"INFY"}),
+        # Commodities with spaces
+        ('commodity "AAPL 2023-10-23 Call 195.00"', {"AAPL 2023-10-23 CALL 195.00"}),
+        ('commodity "BRK B"', {"BRK B"}),
+        # Unterminated quote runs to the end of the line
+        ('commodity "NIFTYBEES', {"NIFTYBEES"}),
+        # Excluded instrument markers
+        ('commodity "AAPL 2023-10-23 Call 195.00" ; Option', set()),
+        ('commodity "717GS2033" ; GSec', set()),
+        ('commodity "PPFAS FLEXI CAP" ; Mutual Fund', set()),
+        # Lines that are not commodities
+        ("commodity AAPL", set()),
+        ('; commodity "AAPL"', set()),
+        ('P 2024-01-02 "AAPL" 185.64 USD', set()),
+        ('    note "AAPL"', set()),
+        ("", set()),
+    ],
+)
+def test_read_commodity_file_line(tmp_path, line, expected):
+    commodity_file = tmp_path / "commodities.ledger"
+    commodity_file.write_text(line + "\n")
+
+    assert read_commodity_file(commodity_file) == expected
+
+
+def test_read_commodity_file_collects_all_lines(tmp_path):
+    commodity_file = tmp_path / "commodities.ledger"
+    commodity_file.write_text(
+        'commodity "AAPL"\n'
+        '; commodity "MSFT"\n'
+        'commodity "717GS2033" ; GSec\n'
+        "\n"
+        '  commodity "infy"\n'
+        'commodity "aapl"\n'
+    )
+
+    assert read_commodity_file(commodity_file) == {"AAPL", "INFY"}
+
+
+def test_read_commodity_file_missing(tmp_path):
+    assert read_commodity_file(tmp_path / "missing.ledger") == set()
+
+
+def yf_download_frame(closes):
+    """yf.download(group_by="ticker") shaped frame with (ticker, field) columns."""
+    index = pd.DatetimeIndex(["2025-01-02", "2025-01-03"], name="Date")
+    frames = {
+        ticker: pd.DataFrame({"Open": values, "Close": values}, index=index)
+        for ticker, values in closes.items()
+    }
+    return pd.concat(frames, axis=1)
+
+
+@pytest.mark.parametrize(
+    "commodities, closes, expected",
+    [
+        # One ticker still comes back with a ticker level
+        (
+            ["AAPL"],
+            {"AAPL": [243.5, 242.0]},
+            [("AAPL", [("2025-01-02", 243.5), ("2025-01-03", 242.0)])],
+        ),
+        # Several tickers, crypto is fetched against USD, gaps are dropped
+        (
+            ["AAPL", "btc"],
+            {"AAPL": [243.5, np.nan], "BTC-USD": [96886.9, 98107.4]},
+            [
+                ("AAPL", [("2025-01-02", 243.5)]),
+                ("btc", [("2025-01-02", 96886.9), ("2025-01-03", 98107.4)]),
+            ],
+        ),
+        # Tickers missing from the result or without any close get no prices
+        (
+            ["AAPL", "DELISTED", "MSFT"],
+            {"AAPL": [243.5, 242.0], "MSFT": [np.nan, np.nan]},
+            [
+                ("AAPL", [("2025-01-02", 243.5), ("2025-01-03", 242.0)]),
+                ("DELISTED", []),
+                ("MSFT", []),
+            ],
+        ),
+    ],
+)
+def test_fetch_us_price_histories(commodities, closes, expected):
+    with patch.object(
+        price_db_writer.yf, "download", return_value=yf_download_frame(closes)
+    ) as download:
+        result = list(fetch_us_price_histories(commodities, 2025))
+
+    assert result == expected
+    download.assert_called_once()
+    assert download.call_args.kwargs["group_by"] == "ticker"
+    assert download.call_args.kwargs["multi_level_index"] is True
+
+
+def test_fetch_us_price_histories_empty_download():
+    with patch.object(price_db_writer.yf, "download", return_value=pd.DataFrame()):
+        result = list(fetch_us_price_histories(["AAPL", "MSFT"], 2025))
+
+    assert result == [("AAPL", []), ("MSFT", [])]
+
+
+def test_fetch_us_price_histories_no_commodities():
+    with patch.object(price_db_writer.yf, "download") as download:
+        assert list(fetch_us_price_histories([], 2025)) == []
+
+    download.assert_not_called()
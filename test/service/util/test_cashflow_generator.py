@@ -23,9 +23,13 @@ def test_generate_coupon_dates():
     maturity_date = date(2027, 3, 20)
     coupon_frequency = 2
     coupons = cg.generate_coupon_dates(start_date, maturity_date, coupon_frequency)
-    expected_coupons = [date(2026, 3, 20), date(2026, 9, 21)]
+    expected_coupons = (date(2026, 3, 20), date(2026, 9, 21))
     assert coupons == expected_coupons
 
+    # repeated calls are served from the cache
+    cached = cg.generate_coupon_dates(start_date, maturity_date, coupon_frequency)
+    assert cached is coupons
+
 
 def test_apply_coupon_and_principal_simple():
     # input
@@ -0,0 +1,26 @@
+from src.service.util.config_loader import load_yaml_config
+
+
+def test_load_yaml_config_parses_once(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        "dashboard:\n  zero_balance_accounts:\n    - Assets:Clearing\n"
+    )
+
+    first = load_yaml_config(config_path)
+    second = load_yaml_config(config_path)
+
+    assert first == {"dashboard": {"zero_balance_accounts": ["Assets:Clearing"]}}
+    assert second is first
+
+
+def test_load_yaml_config_reloads_edited_file(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("dashboard:\n  mutual_funds: []\n")
+    first = load_yaml_config(config_path)
+
+    config_path.write_text("dashboard: {}\n")
+    second = load_yaml_config(config_path)
+
+    assert first == {"dashboard": {"mutual_funds": []}}
+    assert second == {"dashboard": {}}
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 
 import pandas as pd
 import pytest
@@ -30,3 +30,9 @@ from src.service.util import date_util as du
 def test_parse_indian_date_format(input_val, expected):
     result = du.parse_indian_date_format(input_val)
     assert result == expected
+
+
+def test_parse_indian_date_format_cache_keeps_input_types_apart():
+    assert du.parse_indian_date_format(datetime(2025, 2, 18)) == datetime(2025, 2, 18)
+    result = du.parse_indian_date_format(pd.Timestamp("2025-02-18"))
+    assert type(result) is date
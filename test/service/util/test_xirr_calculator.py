@@ -72,6 +72,15 @@ from src.service.util import xirr_calculator as xc
             [-1000, 0, 1100],
             0.1,
         ),
+        # Two non-zero cashflows with zeros around them → closed form
+        (
+            [date(2025, 1, 1), date(2025, 3, 1), date(2026, 1, 1), date(2026, 6, 1)],
+            [0, -1000, 0, 1200],
+            0.1567,
+        ),
+        # Two cashflows, large gain over 3 days → closed form overflows,
+        # falls back to Newton-Raphson which gives up with 0
+        ([date(2026, 1, 1), date(2026, 1, 4)], [-100, 1000000], 0),
         # Mismatched lengths → should raise
         ([date(2025, 1, 1), date(2026, 1, 1)], [-1000, 500, 700], "ValueError"),
         # Single cashflow only → should raise (need at least one sign change)